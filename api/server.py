@@ -0,0 +1,158 @@
+# api/server.py
+# Service HTTP headless (ASGI) au-dessus du même Container / Orchestrator que l'UI.
+# Lancement : uvicorn api.server:app --host 0.0.0.0 --port 8000
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from core.bootstrap_core import BootstrapCore
+from core.dependencies import create_container
+from core.qualification import QUESTIONS
+from monitoring import metrics
+
+logger = logging.getLogger("api")
+
+
+class QualificationAnswer(BaseModel):
+    # Étape hors du questionnaire : 422 plutôt qu'une IndexError (500)
+    current_step: int = Field(ge=0, lt=len(QUESTIONS))
+    response: str
+
+class ReformulationRequest(BaseModel):
+    qualification: Dict[str, str]
+
+class ChatRequest(BaseModel):
+    question: str
+    qualification: Dict[str, str] = Field(default_factory=dict)
+    conversation: List[Dict] = Field(default_factory=list)
+    mode: Optional[str] = None
+
+
+class ConcurrencyLimiter:
+    """Borne le nombre de requêtes pipeline en cours ; au-delà d'une attente max, 503."""
+
+    def __init__(self, max_concurrency: int, queue_timeout: float):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.queue_timeout = queue_timeout
+
+    async def acquire(self):
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="Serveur saturé, réessayez plus tard")
+
+    def release(self):
+        self.semaphore.release()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Ressources partagées par toutes les requêtes du worker : modèle, client Chroma, LLM
+    container = create_container()
+    app.state.container = container
+    app.state.pipeline = await BootstrapCore(container).initialize()
+    app.state.limiter = ConcurrencyLimiter(
+        max_concurrency=container.config.api_max_concurrency() or 16,
+        queue_timeout=container.config.api_queue_timeout() or 10.0,
+    )
+    logger.info("API prête")
+    yield
+    # Arrêt propre : les évaluations en file sont écrites avant la sortie
+    evaluator = app.state.pipeline.evaluator
+    if evaluator is not None:
+        await asyncio.to_thread(evaluator.stop)
+
+
+app = FastAPI(title="Smart CV RAG API", lifespan=lifespan)
+
+
+class _SlotStreamingResponse(StreamingResponse):
+    """Flux qui libère son slot de concurrence quoi qu'il arrive.
+
+    Le finally d'un générateur ne s'exécute pas si le client se déconnecte avant que
+    Starlette ait commencé à itérer le corps : la libération se fait donc ici.
+    """
+
+    def __init__(self, content, release, **kwargs):
+        super().__init__(content, **kwargs)
+        self._release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._release()
+
+
+async def _limited(request: Request, coro):
+    limiter = request.app.state.limiter
+    await limiter.acquire()
+    try:
+        return await coro
+    finally:
+        limiter.release()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    # Hors limiteur : le scrape ne doit jamais attendre derrière les requêtes pipeline
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/health")
+async def health(request: Request):
+    retriever = request.app.state.container.retriever()
+    return {"status": "ok", "index_version": retriever.index_version}
+
+
+@app.post("/qualification/start")
+async def start_qualification(request: Request):
+    return {"question": await request.app.state.pipeline.start_qualification()}
+
+
+@app.post("/qualification/answer")
+async def answer_qualification(body: QualificationAnswer, request: Request):
+    next_question = await request.app.state.pipeline.process_qualification_response(
+        body.response, body.current_step
+    )
+    return {"question": next_question, "done": next_question is None}
+
+
+@app.post("/reformulate")
+async def reformulate(body: ReformulationRequest, request: Request):
+    qualification_text = "\n".join(f"{k}: {v}" for k, v in body.qualification.items())
+    reformulation = await _limited(request, request.app.state.pipeline.reformulate(qualification_text))
+    return {"reformulation": reformulation}
+
+
+@app.post("/chat")
+async def chat(body: ChatRequest, request: Request):
+    state = await _limited(
+        request,
+        request.app.state.pipeline.chat(body.question, body.qualification, body.conversation, body.mode)
+    )
+    return {"answer": state.answer, "contexts": state.contexts, "timings": state.timings}
+
+
+@app.post("/chat/stream")
+async def chat_stream(body: ChatRequest, request: Request):
+    pipeline = request.app.state.pipeline
+    limiter = request.app.state.limiter
+    await limiter.acquire()
+    try:
+        state = await pipeline.prepare_chat(body.question, body.qualification, body.conversation, body.mode)
+    except BaseException:
+        limiter.release()
+        raise
+
+    async def tokens():
+        async for token in pipeline.stream_answer(state):
+            yield token
+
+    # Le slot de concurrence est tenu jusqu'à la fin du flux
+    return _SlotStreamingResponse(tokens(), release=limiter.release, media_type="text/plain; charset=utf-8")
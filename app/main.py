@@ -1,11 +1,9 @@
 # app/main.py
 import os
 import streamlit as st
-import asyncio
 import logging
 from dotenv import load_dotenv
-from core.dependencies import Container
-from app.services.bootstrap_service import StreamlitBootstrapService
+from app.services.bootstrap_service import StreamlitBootstrapService, get_container
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -14,9 +12,8 @@ logger = logging.getLogger(__name__)
 # Chargement des variables d'environnement
 load_dotenv()
 
-# Initialisation du conteneur
-container = Container()
-container.config.from_dict({
+# Conteneur partagé par toutes les sessions du process
+container = get_container({
     "pdf_path": "data/raw/CV_Eric_Wetzel_2026.pdf",
     "embedder_model": "all-MiniLM-L6-v2",
     "llm_model": "mistral-large-latest",
@@ -35,9 +32,8 @@ st.set_page_config(page_title="CV interactif", layout="wide")
 
 # Initialisation du pipeline
 try:
-    if "bootstrapped" not in st.session_state:
-        pipeline = asyncio.run(bootstrap_service.initialize())
-        logger.info("Pipeline initialisé avec succès")
+    # Pipeline partagé (st.cache_resource) : pas de bootstrap par session
+    pipeline = bootstrap_service.initialize()
 except Exception as e:
     logger.error(f"Échec de l'initialisation: {e}", exc_info=True)
     st.error(f"Échec de l'initialisation: {e}")
@@ -32,6 +32,9 @@ if "phase" not in st.session_state:
 
 # Initialisation du premier message
 if len(st.session_state.messages) == 0 and st.session_state.phase == "qualification":
+    # Nouvelle session ou conversation remise à zéro : le résumé précédent ne doit pas fuiter
+    if "memory" in st.session_state:
+        st.session_state.memory.reset()
     try:
         first_question = st.session_state.pipeline.start_qualification_sync()
         st.session_state.messages.append({
@@ -79,7 +82,11 @@ if user_input:
                 qualification_text = "\n".join(
                     f"{k}: {v}" for k, v in st.session_state.qualification.items()
                 )
-                reform_response = st.session_state.pipeline.reformulate_sync(qualification_text)
+                # Streaming : les tokens s'affichent dès leur arrivée
+                with st.chat_message("assistant"):
+                    reform_response = st.write_stream(
+                        st.session_state.pipeline.reformulate_stream_sync(qualification_text)
+                    )
                 st.session_state.messages.append({
                     "role": "assistant",
                     "content": reform_response
@@ -92,19 +99,26 @@ if user_input:
 
     # Phase de chat
     elif st.session_state.phase == "chat":
-        qualification_text = "\n".join(
-            f"{k}: {v}" for k, v in st.session_state.qualification.items()
-        )
-
-        # ⭐ Version ultra-simple comme votre exemple
-        answer = st.session_state.pipeline.generate_sync(
-            question=user_input,
-            context=[qualification_text],
-            conversation=st.session_state.messages
-        )
-
-        st.session_state.messages.append({
-            "role": "assistant",
-            "content": answer
-        })
+        try:
+            # Reformulation en cache + retrieval sur la question, puis génération en streaming
+            state = st.session_state.pipeline.prepare_chat_sync(
+                question=user_input,
+                qualification=st.session_state.qualification,
+                # Résumé glissant + derniers messages : taille de prompt quasi constante
+                conversation=st.session_state.memory.window(st.session_state.messages)
+            )
+            with st.chat_message("assistant"):
+                answer = st.write_stream(st.session_state.pipeline.stream_answer_sync(state))
+            logger.info(f"Durées par étape (ms): {state.timings}")
+
+            st.session_state.messages.append({
+                "role": "assistant",
+                "content": answer,
+                "timings": state.timings
+            })
+            # Condensation des anciens messages en arrière-plan (hors chemin critique)
+            st.session_state.memory.update(st.session_state.messages)
+        except Exception as e:
+            logger.error(f"Erreur dans la phase de chat: {str(e)}")
+            st.error("Une erreur est survenue. Veuillez réessayer.")
     st.rerun()
@@ -1,25 +1,42 @@
 # app/services/bootstrap_service.py
-import asyncio
 import streamlit as st
 import logging
-from core.dependencies import Container
+from core.dependencies import Container, create_container
 from core.bootstrap_core import BootstrapCore  # Import corrigé
+from utils.event_loop import run_sync
 
 logger = logging.getLogger("bootstrap_service")
 
+@st.cache_resource(show_spinner=False)
+def get_container(config: dict) -> Container:
+    """Conteneur unique par process : modèle d'embedding, client Chroma et LLM partagés."""
+    logger.info("Création du conteneur partagé")
+    return create_container(config)
+
+@st.cache_resource(show_spinner="Initialisation du pipeline...", max_entries=1)
+def _shared_pipeline(_container: Container, corpus_fingerprint: str):
+    """Orchestrator partagé en lecture seule par toutes les sessions.
+
+    La clé est l'empreinte du corpus : si un document change, le pipeline est
+    reconstruit une seule fois (réindexation incrémentale) et l'ancien est évincé.
+    """
+    logger.info(f"Bootstrap du pipeline partagé (corpus {corpus_fingerprint[:8]})")
+    return run_sync(BootstrapCore(_container).initialize())
+
 class StreamlitBootstrapService:
     def __init__(self, container: Container):
         self.container = container  # ← Ajout de cette ligne manquante
         self.bootstrap_core = BootstrapCore(container)
 
-    async def initialize(self):
+    def initialize(self):
         try:
-            if "bootstrapped" not in st.session_state:
-                with st.spinner("Initialisation du pipeline..."):
-                    pipeline = await self.bootstrap_core.initialize()
-                    st.session_state.pipeline = pipeline
-                    st.session_state.bootstrapped = True
-            return st.session_state.pipeline
+            # Quasi gratuit hors premier appel : seul le stat() des fichiers du corpus est recalculé
+            pipeline = _shared_pipeline(self.container, self.bootstrap_core.corpus_fingerprint())
+            st.session_state.pipeline = pipeline
+            if "memory" not in st.session_state:
+                st.session_state.memory = self.container.memory()
+            st.session_state.bootstrapped = True
+            return pipeline
         except Exception as e:
             logger.error(f"Erreur inattendue: {e}", exc_info=True)
             st.error(f"Erreur inattendue: {e}")
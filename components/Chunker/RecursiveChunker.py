@@ -18,10 +18,17 @@ class RecursiveChunker(Chunker):
             separators=["\n\n", "\n", ".", "!", "?"]
         )
 
+    @property
+    def signature(self) -> str:
+        return f"recursive:{self.chunk_size}:{self.chunk_overlap}"
+
     async def chunk(self, documents: list[Document]) -> list[Document]:
         logger.info(f"Chunking {len(documents)} documents...")
         for doc in documents:
             splits = self.text_splitter.split_text(doc.content)
-            doc.chunks = [Chunk(text, i) for i, text in enumerate(splits)]
+            doc.chunks = [
+                Chunk(text, i, source=doc.source, config=self.signature)
+                for i, text in enumerate(splits)
+            ]
         logger.info(f"Generated {sum(len(doc.chunks) for doc in documents)} chunks")
         return documents
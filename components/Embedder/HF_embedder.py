@@ -1,36 +1,179 @@
+import asyncio
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
+import numpy as np
 from components.base_components import Embedding
+from components.Embedder.embedding_cache import EmbeddingCache
+from utils.event_loop import run_sync
+from monitoring import metrics
 from langchain_community.embeddings import HuggingFaceEmbeddings
 import logging
 
 logger = logging.getLogger("embedder")
 
+def _available_memory() -> int | None:
+    """Mémoire physique disponible en octets (None si non mesurable)."""
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+class AdaptiveBatchSizer:
+    """Ajuste la taille de batch d'après le débit mesuré et la mémoire disponible.
+
+    On double tant que le débit (textes/s) progresse, on revient en arrière
+    dès qu'il se dégrade ; la borne haute est fixée par la mémoire libre.
+    """
+
+    def __init__(self, initial: int = 32, minimum: int = 8, maximum: int = 512,
+                 bytes_per_text: int = 4 * 1024 * 1024, memory_fraction: float = 0.25):
+        self.size = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.bytes_per_text = bytes_per_text
+        self.memory_fraction = memory_fraction
+        self._best_throughput = 0.0
+
+    def _memory_cap(self) -> int:
+        available = _available_memory()
+        if available is None:
+            return self.maximum
+        return max(self.minimum, int(available * self.memory_fraction // self.bytes_per_text))
+
+    def next_size(self) -> int:
+        return max(self.minimum, min(self.size, self.maximum, self._memory_cap()))
+
+    def record(self, batch_len: int, elapsed: float, requested: int):
+        """`requested` : taille donnée par next_size() (éventuellement plafonnée par la mémoire)."""
+        # Un batch partiel (fin de liste) ne dit rien sur la taille demandée
+        if elapsed <= 0 or batch_len < requested:
+            return
+        throughput = batch_len / elapsed
+        if throughput > self._best_throughput * 1.05:
+            self._best_throughput = throughput
+            self.size = min(requested * 2, self.maximum)
+        elif throughput < self._best_throughput * 0.8:
+            self.size = max(requested // 2, self.minimum)
+
 class HFEmbedding(Embedding):
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2", hf_token: str | None = None, batch_size: int = 128):
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        hf_token: str | None = None,
+        batch_size: int = 32,
+        cache: EmbeddingCache | None = None
+    ):
         # Pas d'appel à super().__init__()
         self.name = "HF Embedding"
         self.description = "HuggingFace Embeddings configurable"
         self.model_name = model_name
         self.hf_token = hf_token or os.getenv("HF_API_TOKEN")
         self.model_instance = None
-        self.batch_size = batch_size
+        self._dimension: int | None = None
+        self.batch_sizer = AdaptiveBatchSizer(initial=batch_size)
+        self.cache = cache
+        # Thread dédié à l'encodeur : la boucle d'événements reste libre.
+        # Chaque batch est soumis séparément, une requête n'attend donc qu'un batch d'indexation.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hf-embedder")
 
-    async def embed(self, texts: List[str]) -> List[List[float]]:
+    def get_model(self) -> HuggingFaceEmbeddings:
+        """Instancie le modèle à la première utilisation (partagé avec Chroma)."""
         if self.model_instance is None:
             self.model_instance = HuggingFaceEmbeddings(
                 model_name=self.model_name,
                 model_kwargs={"use_auth_token": self.hf_token} if self.hf_token else {}
             )
+        return self.model_instance
+
+    @property
+    def dimension(self) -> int:
+        if self._dimension is None:
+            self._dimension = self.get_model().client.get_sentence_embedding_dimension()
+        return self._dimension
+
+    def _encode_batch(self, batch: List[str]) -> np.ndarray:
+        model = self.get_model()
+        return model.client.encode(
+            batch,
+            batch_size=len(batch),
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """Embeddings (n, dim) en float32 contigu, calculés hors de la boucle d'événements."""
+        with metrics.timer("embed"):
+            return await self._embed(texts)
+
+    async def _embed(self, texts: List[str]) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        # Lue une seule fois (chargement du modèle) : pas d'aller-retour par appel ensuite
+        dim = self._dimension or await loop.run_in_executor(self._executor, lambda: self.dimension)
+        out = np.zeros((len(texts), dim), dtype=np.float32)
+
+        cached = {}
+        if self.cache is not None and texts:
+            cached = await loop.run_in_executor(self._executor, self.cache.get_many, self.model_name, texts)
+            for i, vector in cached.items():
+                out[i] = vector
+        missing = [i for i in range(len(texts)) if i not in cached]
+        if not missing:
+            return out
+
+        encoded, ok = await self._encode(loop, [texts[i] for i in missing], dim)
+        out[missing] = encoded
+        if self.cache is not None and ok.any():
+            # Les vecteurs nuls de repli ne sont jamais mis en cache
+            await loop.run_in_executor(
+                self._executor, self.cache.put_many, self.model_name,
+                [texts[i] for i, valid in zip(missing, ok) if valid], encoded[ok]
+            )
+        return out
 
-        all_embeddings = []
-        for i in range(0, len(texts), self.batch_size):
-            batch = texts[i:i + self.batch_size]
+    async def _encode(self, loop, texts: List[str], dim: int) -> tuple[np.ndarray, np.ndarray]:
+        out = np.zeros((len(texts), dim), dtype=np.float32)
+        ok = np.ones(len(texts), dtype=bool)
+        i = 0
+        while i < len(texts):
+            size = self.batch_sizer.next_size()
+            batch = texts[i:i + size]
+            start = time.perf_counter()
             try:
-                embeddings = self.model_instance.embed_documents(batch)
-                all_embeddings.extend(embeddings)
+                out[i:i + len(batch)] = await loop.run_in_executor(self._executor, self._encode_batch, batch)
+                self.batch_sizer.record(len(batch), time.perf_counter() - start, size)
             except Exception as e:
+                # Vecteurs nuls pour le batch fautif : on n'arrête pas le pipeline
                 logger.warning(f"Erreur sur batch {i}-{i+len(batch)}: {e}")
-                dim = getattr(self.model_instance, "embedding_dimension", 384)
-                all_embeddings.extend([[0.0] * dim for _ in batch])
-        return all_embeddings
+                metrics.inc("smartcv_errors_total", component="embed")
+                ok[i:i + len(batch)] = False
+            i += len(batch)
+        return out, ok
+
+    def encode_blocking(self, texts: List[str], batch_size: int = 16, normalize: bool = False) -> np.ndarray:
+        """Encodage direct (sans cache) depuis un thread hors boucle, ex: worker d'évaluation.
+
+        Les lots sont soumis un à un au thread de l'encodeur : une requête utilisateur
+        n'attend jamais plus d'un petit lot.
+        """
+        def encode_batch(batch: List[str]) -> np.ndarray:
+            return self.get_model().client.encode(
+                batch,
+                batch_size=len(batch),
+                convert_to_numpy=True,
+                normalize_embeddings=normalize,
+                show_progress_bar=False
+            )
+
+        return np.concatenate([
+            self._executor.submit(encode_batch, texts[i:i + batch_size]).result()
+            for i in range(0, len(texts), batch_size)
+        ])
+
+    def embed_sync(self, texts: List[str]) -> np.ndarray:
+        """Variante synchrone pour les appelants sans boucle d'événements (Streamlit)."""
+        return run_sync(self.embed(texts))
+
+    async def embed_query(self, text: str) -> np.ndarray:
+        return (await self.embed([text]))[0]
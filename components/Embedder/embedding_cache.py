@@ -0,0 +1,109 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List
+import numpy as np
+
+logger = logging.getLogger("embedding_cache")
+
+class EmbeddingCache:
+    """Cache disque des embeddings, clé (modèle, sha256 du texte), éviction LRU.
+
+    Stocké dans une table SQLite (vecteurs float32 en BLOB) partagée par
+    l'indexation et les requêtes : un texte déjà vu n'est jamais ré-encodé.
+    """
+
+    def __init__(self, path: str | None = None, max_entries: int | None = None):
+        self.path = path or "data/embedding_cache.sqlite3"
+        self.max_entries = max_entries or 50_000
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    model TEXT NOT NULL,
+                    digest TEXT NOT NULL,
+                    dim INTEGER NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (model, digest)
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON embeddings(last_access)")
+        return self._conn
+
+    @staticmethod
+    def digest(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get_many(self, model: str, texts: List[str]) -> Dict[int, np.ndarray]:
+        """Retourne {position: vecteur} pour les textes présents dans le cache."""
+        digests = [self.digest(t) for t in texts]
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            conn = self._connect()
+            unique = list(dict.fromkeys(digests))
+            # Limite SQLite sur le nombre de paramètres : on interroge par paquets
+            for i in range(0, len(unique), 500):
+                part = unique[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT digest, vector FROM embeddings WHERE model = ? AND digest IN ({','.join('?' * len(part))})",
+                    [model, *part]
+                ).fetchall()
+                for digest, blob in rows:
+                    found[digest] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE model = ? AND digest = ?",
+                    [(now, model, d) for d in found]
+                )
+                conn.commit()
+
+        result = {i: found[d] for i, d in enumerate(digests) if d in found}
+        self.hits += len(result)
+        self.misses += len(texts) - len(result)
+        return result
+
+    def put_many(self, model: str, texts: List[str], vectors: np.ndarray):
+        if not texts:
+            return
+        now = time.time()
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        rows = [
+            (model, self.digest(t), vectors.shape[1], vectors[i].tobytes(), now)
+            for i, t in enumerate(texts)
+        ]
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, digest, dim, vector, last_access) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection):
+        (count,) = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+                (overflow,)
+            )
+            logger.info(f"Cache d'embeddings: {overflow} entrées évincées (LRU)")
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
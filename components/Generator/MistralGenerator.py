@@ -1,5 +1,7 @@
-from typing import List, Dict, AsyncGenerator
+from typing import List, Dict, AsyncGenerator, Tuple
 from components.base_components import Generator, PromptStrategy
+from components.Generator.semantic_cache import SemanticCache
+from monitoring import metrics
 from trulens.apps.custom import instrument
 import asyncio
 import logging
@@ -7,38 +9,103 @@ import logging
 logger = logging.getLogger("generator")
 
 class LLMGenerator:
-    def __init__(self, llm, prompt_strategy: PromptStrategy):
+    def __init__(self, llm, prompt_strategy: PromptStrategy, cache: SemanticCache | None = None):
         # INITIALISATION DIRECTE (sans super().__init__)
         self.name = "LLM Generator"
         self.description = "LangChain based generator with PromptStrategy"
         self.llm = llm
         self.prompt_strategy = prompt_strategy
+        self.cache = cache
 
-    # Méthode synchrone pour Streamlit (encapsulation propre)
-    @instrument
-    def generate_sync(self, question: str, context: List[str], conversation: List[Dict] | None = None) -> str:
-        """Version synchrone ultra-simple"""
+    def _render(
+        self, question: str, context: List[str], conversation: List[Dict] | None
+    ) -> Tuple[str, Dict | None]:
+        with metrics.timer("prompt_build"):
+            return self._build_prompt(question, context, conversation)
+
+    def _build_prompt(
+        self, question: str, context: List[str], conversation: List[Dict] | None
+    ) -> Tuple[str, Dict | None]:
+        """Prompt final et rapport de tokens de cet appel (rien n'est stocké sur l'instance partagée)."""
         payload, template = self.prompt_strategy.build(
             question=question,
             context=context,
             state=conversation
         )
+        # Rapport de tokens (ContextPacker) : hors template
+        usage = payload.pop("token_usage", None)
+        if usage is not None:
+            logger.info(
+                f"🔢 Tokens prompt - contexte: {usage['context_tokens']}, "
+                f"historique: {usage['history_tokens']}, question: {usage['question_tokens']}"
+            )
+        return template.format(**payload), usage
+
+    def _record_tokens(self, usage: Dict | None, prompt_usage: Dict | None = None):
+        """Tokens réels rapportés par Mistral, sinon estimation du ContextPacker pour l'entrée."""
+        if not metrics.is_enabled():
+            return
+        usage = usage or {}
+        tokens_in = usage.get("input_tokens")
+        if tokens_in is None and prompt_usage is not None:
+            tokens_in = prompt_usage.get("total_tokens")
+        metrics.record_tokens(tokens_in, usage.get("output_tokens"), model=getattr(self.llm, "model", "") or "")
+
+    def _cache_namespace(self, context: List[str]) -> str:
+        return SemanticCache.namespace(getattr(self.prompt_strategy, "name", ""), context or [])
 
-        prompt = template.format(**payload)
+    # Méthode synchrone pour Streamlit (encapsulation propre)
+    @instrument
+    def generate_sync(
+        self,
+        question: str,
+        context: List[str],
+        conversation: List[Dict] | None = None,
+        use_cache: bool = True
+    ) -> str:
+        """Version synchrone ultra-simple"""
+        vector = None
+        if self.cache is not None and use_cache:
+            namespace = self._cache_namespace(context)
+            cached, vector = self.cache.lookup(question, namespace)
+            if cached is not None:
+                return cached
+
+        prompt, prompt_usage = self._render(question, context, conversation)
 
         # ⭐ Utilisation directe de invoke (synchrone) au lieu de ainvoke
-        response = self.llm.invoke(prompt)
+        with metrics.timer("llm"):
+            response = self.llm.invoke(prompt)
+        self._record_tokens(getattr(response, "usage_metadata", None), prompt_usage)
+        if vector is not None:
+            self.cache.store(vector, namespace, response.content)
         return response.content
     # -------------------------
     # Méthode ASYNCHRONE interne
     # -------------------------
     # Méthode asynchrone principale (comme dans votre ancienne version)
     @instrument
-    async def generate(self, question: str, context: List[str], conversation: List[Dict] | None = None) -> str:
+    async def generate(
+        self,
+        question: str,
+        context: List[str],
+        conversation: List[Dict] | None = None,
+        use_cache: bool = True
+    ) -> str:
         """Méthode asynchrone principale (compatibilité totale)"""
-        payload, template = self.prompt_strategy.build(question, context, conversation)
-        prompt = template.format(**payload)
-        response = await self.llm.ainvoke(prompt)
+        vector = None
+        if self.cache is not None and use_cache:
+            namespace = self._cache_namespace(context)
+            cached, vector = await self.cache.alookup(question, namespace)
+            if cached is not None:
+                return cached
+
+        prompt, prompt_usage = self._render(question, context, conversation)
+        with metrics.timer("llm"):
+            response = await self.llm.ainvoke(prompt)
+        self._record_tokens(getattr(response, "usage_metadata", None), prompt_usage)
+        if vector is not None:
+            self.cache.store(vector, namespace, response.content)
         return response.content
 
     # -------------------------
@@ -49,13 +116,25 @@ class LLMGenerator:
         self,
         question: str,
         context: List[str],
-        conversation: List[Dict] | None = None
+        conversation: List[Dict] | None = None,
+        use_cache: bool = True
     ) -> AsyncGenerator[str, None]:
-        payload, template = self.prompt_strategy.build(
-            question=question,
-            context=context,
-            state=conversation
-        )
-        prompt = template.format(**payload)
-        async for chunk in self.llm.astream(prompt):
-            yield chunk.content
+        vector = None
+        if self.cache is not None and use_cache:
+            namespace = self._cache_namespace(context)
+            cached, vector = await self.cache.alookup(question, namespace)
+            if cached is not None:
+                yield cached
+                return
+
+        prompt, prompt_usage = self._render(question, context, conversation)
+        parts = []
+        usage = None
+        with metrics.timer("llm_stream"):
+            async for chunk in self.llm.astream(prompt):
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                parts.append(chunk.content)
+                yield chunk.content
+        self._record_tokens(usage, prompt_usage)
+        if vector is not None:
+            self.cache.store(vector, namespace, "".join(parts))
@@ -0,0 +1,106 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+import numpy as np
+
+logger = logging.getLogger("semantic_cache")
+
+class SemanticCache:
+    """Cache de réponses LLM par similarité sémantique de la question.
+
+    Une entrée n'est réutilisée que pour la même stratégie de prompt et le même
+    contexte (digest), et si la similarité cosinus des questions dépasse le seuil.
+    """
+
+    def __init__(
+        self,
+        embedder,
+        threshold: float | None = None,
+        ttl: float | None = None,
+        max_entries: int | None = None,
+        enabled: bool | None = True
+    ):
+        self.embedder = embedder
+        self.threshold = threshold or 0.95
+        self.ttl = ttl or 3600.0
+        self.max_entries = max_entries or 512
+        self.enabled = enabled is not False
+        self.hits = 0
+        self.misses = 0
+        # entry_id -> (namespace, vecteur normalisé, réponse, expiration)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    @staticmethod
+    def namespace(strategy_name: str, context: List[str]) -> str:
+        digest = hashlib.sha256("\x00".join([strategy_name, *context]).encode("utf-8"))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _normalize(vector: np.ndarray) -> np.ndarray:
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _match(self, vector: np.ndarray, namespace: str) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            expired = [eid for eid, entry in self._entries.items() if entry[3] <= now]
+            for eid in expired:
+                del self._entries[eid]
+
+            candidates = [(eid, entry) for eid, entry in self._entries.items() if entry[0] == namespace]
+            if not candidates:
+                self.misses += 1
+                return None
+
+            matrix = np.stack([entry[1] for _, entry in candidates])
+            scores = matrix @ vector
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+
+            eid, entry = candidates[best]
+            self._entries.move_to_end(eid)
+            self.hits += 1
+            logger.info(f"Cache sémantique: hit (similarité {scores[best]:.3f})")
+            return entry[2]
+
+    def _store(self, vector: np.ndarray, namespace: str, answer: str, ttl: float | None = None):
+        with self._lock:
+            self._entries[self._next_id] = (namespace, vector, answer, time.monotonic() + (ttl or self.ttl))
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # -------------------------
+    # API synchrone (Streamlit) / asynchrone (pipeline)
+    # -------------------------
+    def lookup(self, question: str, namespace: str) -> tuple[Optional[str], Optional[np.ndarray]]:
+        """Retourne (réponse en cache ou None, vecteur de la question pour un store ultérieur)."""
+        if not self.enabled:
+            return None, None
+        vector = self._normalize(self.embedder.embed_sync([question])[0])
+        return self._match(vector, namespace), vector
+
+    async def alookup(self, question: str, namespace: str) -> tuple[Optional[str], Optional[np.ndarray]]:
+        if not self.enabled:
+            return None, None
+        vector = self._normalize((await self.embedder.embed([question]))[0])
+        return self._match(vector, namespace), vector
+
+    def store(self, vector: Optional[np.ndarray], namespace: str, answer: str):
+        if not self.enabled or vector is None or not answer:
+            return
+        self._store(vector, namespace, answer)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
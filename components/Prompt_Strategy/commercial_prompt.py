@@ -1,14 +1,16 @@
 from components.base_components import PromptStrategy
+from components.Prompt_Strategy.context_packer import ContextPacker
 from langchain_core.prompts import ChatPromptTemplate
 import logging
 
 logger = logging.getLogger("prompt_strategy")
 
 class CommercialQualificationPrompt(PromptStrategy):
-    def __init__(self):
+    def __init__(self, packer: ContextPacker | None = None):
         # Pas d'appel à super().__init__()
         self.name = "Commercial Qualification Prompt"
         self.description = "Prompt strategy for commercial qualification"
+        self.packer = packer or ContextPacker()
         self.prompt = ChatPromptTemplate.from_messages([
             ("system", """
                 Tu es un assistant commercial spécialisé dans l’analyse de profils professionnels.
@@ -20,11 +22,20 @@ class CommercialQualificationPrompt(PromptStrategy):
                 Réponse max 3 phrases.
             """),
             ("system", "Contexte:\n{context}"),
+            ("system", "Historique de la conversation:\n{history}"),
             ("human", "{question}")
         ])
 
     def build(self, question, context, state):
-        return {"question": question, "context": "\n\n".join(context)}, self.prompt
+        # Contexte et historique bornés par le budget de tokens (rapport renvoyé dans "token_usage")
+        packed_context, history, usage = self.packer.pack(question, context or [], state)
+        payload = {
+            "question": question,
+            "context": packed_context,
+            "history": history or "(aucun)",
+            "token_usage": usage,
+        }
+        return payload, self.prompt
 
 class ReformulationPrompt(PromptStrategy):
     def __init__(self):
@@ -46,3 +57,24 @@ class ReformulationPrompt(PromptStrategy):
             ("human", "{qualification}")
         ])
         return payload, prompt
+
+class ConversationSummaryPrompt(PromptStrategy):
+    def __init__(self):
+        # Pas d'appel à super().__init__()
+        self.name = "Conversation Summary Prompt"
+        self.description = "Prompt strategy for rolling conversation summaries"
+        self.prompt = ChatPromptTemplate.from_messages([
+            ("system", """
+                Tu condenses un échange entre un recruteur et un assistant commercial.
+                Mets à jour le résumé existant avec les nouveaux messages.
+                Conserve les besoins, contraintes, technologies et points déjà abordés.
+                Résumé factuel, 5 phrases maximum, sans formule de politesse.
+            """),
+            ("system", "Résumé existant:\n{summary}"),
+            ("human", "Nouveaux messages:\n{transcript}")
+        ])
+
+    def build(self, question, context=None, state=None):
+        # question : transcription des messages à intégrer ; context : [résumé précédent]
+        payload = {"transcript": question, "summary": "\n".join(context or []) or "(aucun)"}
+        return payload, self.prompt
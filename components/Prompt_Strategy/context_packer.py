@@ -0,0 +1,190 @@
+from typing import Callable, Dict, List, Tuple
+import logging
+import math
+
+logger = logging.getLogger("context_packer")
+
+SUMMARY_ROLE = "summary"
+ROLE_LABELS = {"user": "Recruteur", "assistant": "Assistant", SUMMARY_ROLE: "Résumé des échanges précédents"}
+
+
+class TokenCounter:
+    """Compte les tokens avec le tokenizer Mistral si disponible, sinon par approximation locale."""
+
+    def __init__(self, chars_per_token: float = 3.5):
+        # Pas d'appel à super().__init__()
+        self.name = "Token Counter"
+        self.description = "Mistral tokenizer with a character-based fallback"
+        self.chars_per_token = chars_per_token
+        self._encode: Callable[[str], List[int]] | None = None
+        self._loaded = False
+
+    def _load(self):
+        self._loaded = True
+        try:
+            from mistral_common.tokens.tokenizers.mistral import MistralTokenizer
+            tokenizer = MistralTokenizer.v3().instruct_tokenizer.tokenizer
+            self._encode = lambda text: tokenizer.encode(text, bos=False, eos=False)
+            logger.info("🔢 Tokenizer Mistral chargé")
+        except Exception:
+            logger.info("🔢 Tokenizer Mistral indisponible, approximation locale (%.1f caractères/token)", self.chars_per_token)
+
+    @property
+    def exact(self) -> bool:
+        if not self._loaded:
+            self._load()
+        return self._encode is not None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if not self._loaded:
+            self._load()
+        if self._encode is not None:
+            return len(self._encode(text))
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Coupe le texte (à la frontière de mot) pour tenir dans max_tokens."""
+        if max_tokens <= 0:
+            return ""
+        if self.count(text) <= max_tokens:
+            return text
+        # Recherche dichotomique sur la longueur en caractères
+        low, high = 0, len(text)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.count(text[:mid]) <= max_tokens:
+                low = mid
+            else:
+                high = mid - 1
+        cut = text[:low]
+        space = cut.rfind(" ")
+        return cut[:space] if space > 0 else cut
+
+
+class ContextPacker:
+    """
+    Remplit un budget de tokens avec les chunks (dans l'ordre de pertinence)
+    et l'historique de conversation (des tours les plus récents aux plus anciens).
+    """
+
+    def __init__(
+        self,
+        context_budget: int = 1500,
+        history_budget: int = 500,
+        chunk_overlap: int = 200,
+        min_overlap: int = 20,
+        counter: TokenCounter | None = None
+    ):
+        # Pas d'appel à super().__init__()
+        self.name = "Context Packer"
+        self.description = "Token-budgeted context and history packing"
+        self.context_budget = context_budget
+        self.history_budget = history_budget
+        self.chunk_overlap = chunk_overlap
+        self.min_overlap = min_overlap
+        self.counter = counter or TokenCounter()
+
+    def _overlap(self, left: str, right: str) -> int:
+        """Longueur du plus long suffixe de left qui est aussi un préfixe de right."""
+        longest = min(self.chunk_overlap, len(left), len(right))
+        for size in range(longest, self.min_overlap - 1, -1):
+            if left.endswith(right[:size]):
+                return size
+        return 0
+
+    def deduplicate(self, chunks: List[str]) -> Tuple[List[str], int]:
+        """Supprime les doublons exacts et le recouvrement entre chunks voisins (chunk_overlap)."""
+        kept: List[str] = []
+        removed = 0
+        for chunk in chunks:
+            text = (chunk or "").strip()
+            if not text or any(text in other for other in kept):
+                removed += 1
+                continue
+            for other in kept:
+                # Le début du chunk répète la fin d'un chunk déjà retenu
+                size = self._overlap(other, text)
+                if size:
+                    text = text[size:].lstrip()
+                # La fin du chunk répète le début d'un chunk déjà retenu
+                size = self._overlap(text, other)
+                if size:
+                    text = text[:-size].rstrip()
+            if text:
+                kept.append(text)
+            else:
+                removed += 1
+        return kept, removed
+
+    def pack_context(self, chunks: List[str]) -> Tuple[str, Dict]:
+        unique, duplicates = self.deduplicate(chunks)
+        selected: List[str] = []
+        used = 0
+        for chunk in unique:
+            tokens = self.counter.count(chunk)
+            if used + tokens <= self.context_budget:
+                selected.append(chunk)
+                used += tokens
+            elif not selected:
+                # Le chunk le plus pertinent ne tient pas seul : on le tronque plutôt que de l'écarter
+                chunk = self.counter.truncate(chunk, self.context_budget)
+                selected.append(chunk)
+                used += self.counter.count(chunk)
+        return "\n\n".join(selected), {
+            "context_tokens": used,
+            "chunks_used": len(selected),
+            "chunks_dropped": len(unique) - len(selected),
+            "duplicates_removed": duplicates,
+        }
+
+    def pack_history(self, conversation: List[Dict] | None, question: str) -> Tuple[str, Dict]:
+        messages = [m for m in (conversation or []) if isinstance(m, dict) and m.get("content")]
+        # La question courante est déjà ajoutée à la conversation par l'interface
+        if messages and messages[-1].get("role") == "user" and messages[-1]["content"].strip() == question.strip():
+            messages = messages[:-1]
+
+        # Le résumé glissant est épinglé en tête : on tronque les échanges bruts, pas lui
+        summaries = [m for m in messages if m.get("role") == SUMMARY_ROLE]
+        turns = [m for m in messages if m.get("role") != SUMMARY_ROLE]
+        head: List[str] = []
+        used = 0
+        for message in summaries:
+            line = self.counter.truncate(
+                f"{ROLE_LABELS[SUMMARY_ROLE]}: {message['content']}", self.history_budget - used
+            )
+            if line:
+                head.append(line)
+                used += self.counter.count(line)
+
+        lines: List[str] = []
+        for message in reversed(turns):
+            label = ROLE_LABELS.get(message.get("role"), message.get("role", ""))
+            line = f"{label}: {message['content']}"
+            tokens = self.counter.count(line)
+            if used + tokens > self.history_budget:
+                break
+            lines.append(line)
+            used += tokens
+        lines.reverse()
+        return "\n".join(head + lines), {
+            "history_tokens": used,
+            "turns_used": len(lines),
+            "turns_dropped": len(turns) - len(lines),
+            "summary_used": bool(head),
+        }
+
+    def pack(self, question: str, chunks: List[str], conversation: List[Dict] | None = None) -> Tuple[str, str, Dict]:
+        """Retourne (contexte, historique, rapport de tokens)."""
+        context, context_report = self.pack_context(chunks or [])
+        history, history_report = self.pack_history(conversation, question)
+        report = {
+            **context_report,
+            **history_report,
+            "question_tokens": self.counter.count(question),
+            "exact_count": self.counter.exact,
+        }
+        report["total_tokens"] = report["context_tokens"] + report["history_tokens"] + report["question_tokens"]
+        logger.debug(f"📦 Contexte empaqueté : {report}")
+        return context, history, report
@@ -0,0 +1,59 @@
+from components.base_components import Reader
+from utils.models import Document
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger("json_reader")
+
+# Textes de gabarit laissés dans les fichiers (non renseignés) : jamais indexés
+_PLACEHOLDER_MARKERS = ("TBD", "En 1 phrase:")
+
+def _filled(value) -> bool:
+    if isinstance(value, (list, tuple)):
+        return any(_filled(v) for v in value)
+    text = str(value or "").strip()
+    return bool(text) and not any(marker in text for marker in _PLACEHOLDER_MARKERS)
+
+def _format_project(project: dict) -> str:
+    fields = [
+        ("Projet", str(project.get("titre") or "").replace("_", " ")),
+        ("Rôle", project.get("role")),
+        ("Description", project.get("description_courte")),
+        ("Solution", project.get("solution")),
+        ("Technologies", ", ".join(t for t in project.get("technos") or [] if _filled(t))),
+        ("Compétences", ", ".join(c for c in project.get("competences") or [] if _filled(c))),
+    ]
+    return "\n".join(f"{label}: {value}" for label, value in fields if _filled(value))
+
+def _format_recommendation(reco: dict) -> str:
+    author = ", ".join(str(reco[k]) for k in ("titre", "entreprise") if _filled(reco.get(k)))
+    header = f"Recommandation de {reco.get('nom', '')}" + (f" ({author})" if author else "")
+    lines = [header]
+    if _filled(reco.get("relation")):
+        lines.append(f"Relation: {reco['relation']}")
+    if _filled(reco.get("contenu")):
+        lines.append(reco["contenu"])
+    return "\n".join(lines)
+
+def load_json_records(path: str) -> list[tuple[str, dict]]:
+    """Transforme projects.json / recommandations.json en un texte par entrée."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    if isinstance(data, dict) and "projets" in data:
+        return [(_format_project(p), {"kind": "project", "record": i}) for i, p in enumerate(data["projets"])]
+    if isinstance(data, list):
+        return [(_format_recommendation(r), {"kind": "recommendation", "record": i}) for i, r in enumerate(data)]
+    raise ValueError(f"Format JSON non supporté: {path}")
+
+class JSONReader(Reader):
+    def __init__(self):
+        # Pas d'appel à super().__init__()
+        self.name = "JSON Reader"
+        self.description = "Load projects and recommendations JSON files into documents"
+
+    async def load(self, path: str) -> list[Document]:
+        logger.info(f"Chargement du JSON: {path}")
+        records = await asyncio.to_thread(load_json_records, path)
+        return [Document(content, source=path, metadata=metadata) for content, metadata in records]
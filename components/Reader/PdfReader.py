@@ -1,10 +1,16 @@
 from components.base_components import Reader
 from langchain_community.document_loaders import PyPDFLoader
 from utils.models import Document
+import asyncio
 import logging
 
 logger = logging.getLogger("pdf_reader")
 
+def load_pdf_pages(path: str) -> list[tuple[str, dict]]:
+    """Parsing bloquant d'un PDF (exécuté dans un thread ou un process worker)."""
+    pages = PyPDFLoader(path).load()
+    return [(p.page_content, {"page": i}) for i, p in enumerate(pages)]
+
 class PDFReader(Reader):
     def __init__(self):
         # Pas d'appel à super().__init__() car Reader est une ABC
@@ -13,6 +19,6 @@ class PDFReader(Reader):
 
     async def load(self, path: str) -> list[Document]:
         logger.info(f"Chargement du PDF: {path}")
-        loader = PyPDFLoader(path)
-        pages = loader.load()
-        return [Document(p.page_content) for p in pages]
+        # PyPDFLoader est bloquant : on le sort de la boucle d'événements
+        pages = await asyncio.to_thread(load_pdf_pages, path)
+        return [Document(content, source=path, metadata=metadata) for content, metadata in pages]
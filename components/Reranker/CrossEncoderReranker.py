@@ -0,0 +1,76 @@
+from components.base_components import Reranker
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger("reranker")
+
+class CrossEncoderReranker(Reranker):
+    """Rerank (requête, chunk) avec un petit cross-encoder local, sur CPU, par batchs.
+
+    Le scoring respecte un budget en millisecondes : s'il est dépassé, on garde
+    l'ordre vectoriel d'origine plutôt que de retarder la réponse. Le modèle est
+    chargé au bootstrap (warm_up) pour que le premier utilisateur ne le paie pas.
+    """
+
+    def __init__(
+        self,
+        model_name: str | None = None,
+        budget_ms: float | None = None,
+        batch_size: int | None = None
+    ):
+        # Pas d'appel à super().__init__()
+        self.name = "Cross-Encoder Reranker"
+        self.description = "Local cross-encoder reranking with a latency budget"
+        self.model_name = model_name or "cross-encoder/ms-marco-MiniLM-L-6-v2"
+        self.budget_ms = budget_ms or 150.0
+        self.batch_size = batch_size or 16
+        self.model = None
+        self.fallbacks = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reranker")
+
+    def _get_model(self):
+        if self.model is None:
+            from sentence_transformers import CrossEncoder
+            self.model = CrossEncoder(self.model_name, device="cpu")
+        return self.model
+
+    def warm_up(self):
+        """Charge le modèle et exécute une première prédiction (appelé au bootstrap)."""
+        self._get_model().predict([("warm-up", "warm-up")], batch_size=1)
+        logger.info(f"Cross-encoder prêt ({self.model_name})")
+
+    def _score(self, query: str, candidates: list[str], deadline: float) -> list[float] | None:
+        model = self._get_model()
+        scores = []
+        for i in range(0, len(candidates), self.batch_size):
+            # Requête déjà abandonnée (budget écoulé) : on libère le thread au plus vite
+            if time.perf_counter() > deadline:
+                return None
+            batch = candidates[i:i + self.batch_size]
+            scores.extend(model.predict([(query, c) for c in batch], batch_size=len(batch)).tolist())
+        return scores
+
+    async def rerank(self, query: str, candidates: list[str], k: int = 3) -> list[str]:
+        if len(candidates) <= 1:
+            return candidates[:k]
+        loop = asyncio.get_running_loop()
+        budget = self.budget_ms / 1000
+        try:
+            # L'attente elle-même est bornée : repli immédiat à l'échéance, même en plein batch
+            scores = await asyncio.wait_for(
+                loop.run_in_executor(self._executor, self._score, query, candidates, time.perf_counter() + budget),
+                timeout=budget
+            )
+        except asyncio.TimeoutError:
+            scores = None
+        except Exception as e:
+            logger.warning(f"Rerank indisponible, ordre vectoriel conservé: {e}")
+            scores = None
+        if scores is None:
+            self.fallbacks += 1
+            logger.info(f"Budget de rerank dépassé ({self.budget_ms} ms), ordre vectoriel conservé")
+            return candidates[:k]
+        order = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)
+        return [candidates[i] for i in order[:k]]
@@ -1,49 +1,214 @@
 from components.base_components import Retriever
 from utils.models import Document
 from components.Embedder.HF_embedder import HFEmbedding
-from langchain_community.vectorstores import Chroma
+from components.Retriever.bm25_index import BM25Index
+from utils.cache import TTLCache
+from monitoring import metrics
 import asyncio
+import json
 import logging
 import os
 
 logger = logging.getLogger("retriever")
 
 class ChromaRetriever(Retriever):
-    def __init__(self, persist_directory: str = None):
+    def __init__(
+        self,
+        persist_directory: str = None,
+        embedder: HFEmbedding | None = None,
+        collection_name: str = "langchain",
+        cache_size: int | None = None,
+        cache_ttl: float | None = None,
+        hybrid: bool | None = False,
+        rrf_k: int | None = None
+    ):
         # Pas d'appel à super().__init__()
         self.name = "Chroma Retriever"
         self.description = "Vector store with Chroma"
         self.persist_directory = persist_directory or "data/chroma_index"
+        self.embedder = embedder
+        self.collection_name = collection_name
         self.db = None
+        # Cache des résultats de recherche, vidé dès que la version de l'index change
+        self.result_cache = TTLCache(max_size=cache_size or 256, ttl=cache_ttl or 3600.0)
+        self._index_version = None
+        self._metadata_mtime = None
+        # Recherche hybride : BM25 persisté à côté de chroma.sqlite3, fusion RRF avec le dense
+        self.lexical_index = (
+            BM25Index(os.path.join(self.persist_directory, "bm25_index.json")) if hybrid else None
+        )
+        self.rrf_k = rrf_k or 60
+        self._lexical_ready = False
 
-    async def index(self, documents: list[Document], embedder: HFEmbedding):
-        texts = [chunk.content for doc in documents for chunk in doc.chunks]
+    @property
+    def index_version(self) -> str | None:
+        return self._index_version
 
-        if not texts:
-            logger.warning("Aucun texte à indexer")
+    @index_version.setter
+    def index_version(self, version: str | None):
+        if version != self._index_version:
+            self.result_cache.clear()
+        self._index_version = version
+
+    def _refresh_index_version(self):
+        """Relit metadata.json s'il a changé (réindexation par un autre process)."""
+        path = os.path.join(self.persist_directory, "metadata.json")
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return
+        if mtime == self._metadata_mtime:
+            return
+        self._metadata_mtime = mtime
+        try:
+            with open(path) as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.index_version = metadata.get("index_digest") or metadata.get("corpus_hash")
+
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        return " ".join(query.casefold().split())
+
+    def cache_stats(self) -> dict:
+        return {**self.result_cache.stats(), "index_version": self.index_version}
+
+    def has_persisted_index(self) -> bool:
+        return os.path.exists(os.path.join(self.persist_directory, "chroma.sqlite3"))
+
+    def _open_db(self, create: bool = False):
+        """Ouvre paresseusement la collection persistée (warm start)."""
+        if self.db is not None:
+            return self.db
+        if self.embedder is None or not (create or self.has_persisted_index()):
+            return None
+
+        # Import paresseux : le backend NumPy n'a pas à charger Chroma
+        from langchain_community.vectorstores import Chroma
+
+        logger.info(f"Ouverture de l'index Chroma: {self.persist_directory}")
+        self.db = Chroma(
+            collection_name=self.collection_name,
+            embedding_function=self.embedder.get_model(),
+            persist_directory=self.persist_directory
+        )
+        return self.db
+
+    def _ensure_lexical_index(self, db):
+        """Charge l'index BM25, ou le construit une fois depuis la collection (index antérieur)."""
+        if self.lexical_index is None or self._lexical_ready:
+            return
+        self._lexical_ready = True
+        if self.lexical_index.load():
+            return
+        data = db.get(include=["documents"])
+        if data["ids"]:
+            logger.info(f"Construction de l'index BM25 depuis Chroma ({len(data['ids'])} chunks)")
+            self.lexical_index.add(data["ids"], data["documents"])
+            self.lexical_index.save()
+
+    # -------------------------
+    # Primitives d'indexation incrémentale
+    # -------------------------
+    def existing_ids(self) -> set[str]:
+        db = self._open_db(create=True)
+        self._ensure_lexical_index(db)
+        return set(db.get(include=[])["ids"])
+
+    def upsert(self, ids: list[str], texts: list[str], embeddings, metadatas: list[dict]):
+        if not ids:
+            return
+        db = self._open_db(create=True)
+        db._collection.upsert(
+            ids=ids,
+            embeddings=embeddings,
+            documents=texts,
+            metadatas=metadatas
+        )
+        if self.lexical_index is not None:
+            self._ensure_lexical_index(db)
+            self.lexical_index.add(ids, texts)
+
+    def delete(self, ids: list[str]):
+        if not ids:
             return
+        db = self._open_db(create=True)
+        db.delete(ids=list(ids))
+        if self.lexical_index is not None:
+            self._ensure_lexical_index(db)
+            self.lexical_index.remove(ids)
 
-        logger.info(f"Indexation de {len(texts)} chunks dans Chroma...")
+    def flush(self):
+        """Persiste l'index lexical après une passe d'indexation."""
+        if self.lexical_index is not None:
+            self.lexical_index.save()
 
+    async def index(self, documents: list[Document], embedder: HFEmbedding) -> dict:
+        """Indexation incrémentale : n'embedde que les chunks nouveaux, supprime les obsolètes."""
+        self.embedder = embedder
         try:
-            self.db = Chroma.from_texts(
-                texts=texts,
-                embedding=embedder.model_instance,
-                persist_directory=self.persist_directory
-            )
+            stats = await self.index_incrementally(documents, embedder)
             logger.info("Indexation Chroma terminée avec succès")
+            return stats
         except Exception as e:
             logger.error(f"Erreur ChromaDB: {str(e)}", exc_info=True)
             raise RuntimeError(f"Échec de l'indexation Chroma: {str(e)}")
 
     async def retrieve(self, query: str, k: int = 3) -> list[str]:
-        if self.db is None:
+        return await self.retrieve_many([query], k)
+
+    async def retrieve_many(self, queries: list[str], k: int = 3) -> list[str]:
+        """Multi-requêtes natif : un seul forward d'embedding, une seule recherche Chroma, fusion RRF."""
+        queries = list(dict.fromkeys(q for q in queries if q and q.strip()))
+        if not queries:
+            return []
+
+        try:
+            db = self._open_db()
+        except Exception as e:
+            logger.error(f"Impossible d'ouvrir l'index Chroma: {str(e)}", exc_info=True)
+            return []
+
+        if db is None:
             logger.warning("Aucune base de données Chroma chargée")
             return []
 
+        self._refresh_index_version()
+        cache_key = (tuple(self._normalize_query(q) for q in queries), k)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
+
         try:
-            results = self.db.similarity_search(query, k=k)
-            return [d.page_content for d in results]
+            with metrics.timer("chroma_retrieve"):
+                query_embeddings = await self.embedder.embed(queries)
+                contexts = self._search(db, queries, query_embeddings, k)
+            if contexts:
+                self.result_cache.set(cache_key, tuple(contexts))
+            return contexts
         except Exception as e:
             logger.error(f"Erreur lors de la recherche: {str(e)}", exc_info=True)
             return []
+
+    def _search(self, db, queries: list[str], query_embeddings, k: int) -> list[str]:
+        """Fusion RRF des classements dense (Chroma) et, en mode hybride, lexical (BM25) de chaque requête."""
+        n_candidates = max(k * 4, 20) if (self.lexical_index is not None or len(queries) > 1) else k
+        dense = db._collection.query(
+            query_embeddings=query_embeddings.tolist(),
+            n_results=n_candidates,
+            include=["documents"]
+        )
+        texts = {}
+        rankings = []
+        for ids, documents in zip(dense["ids"], dense["documents"]):
+            texts.update(zip(ids, documents))
+            rankings.append(ids)
+
+        if self.lexical_index is not None:
+            self._ensure_lexical_index(db)
+            for query in queries:
+                rankings.append([chunk_id for chunk_id, _ in self.lexical_index.search(query, n_candidates)])
+
+        best = self.fuse_rankings(rankings, k, self.rrf_k)
+        return [texts.get(chunk_id) or self.lexical_index.texts[chunk_id] for chunk_id in best]
@@ -0,0 +1,146 @@
+from components.base_components import Retriever, Embedding
+from utils.models import Document
+import json
+import logging
+import os
+import numpy as np
+
+logger = logging.getLogger("numpy_retriever")
+
+class NumpyRetriever(Retriever):
+    """Recherche exacte en mémoire pour petits corpus (dizaines à centaines de chunks).
+
+    Les embeddings L2-normalisés sont stockés dans une seule matrice float32
+    mappée en mémoire ; un top-k = un produit matrice-vecteur + argpartition.
+    """
+
+    def __init__(self, persist_directory: str = None, embedder: Embedding | None = None):
+        # Pas d'appel à super().__init__()
+        self.name = "NumPy Retriever"
+        self.description = "Exact cosine search over a memory-mapped float32 matrix"
+        self.persist_directory = persist_directory or "data/numpy_index"
+        self.embedder = embedder
+        self.index_version = None
+        self._ids: list[str] = []
+        self._texts: list[str] = []
+        self._metadatas: list[dict] = []
+        self._matrix: np.ndarray | None = None
+        self._loaded = False
+        # Modifications en attente jusqu'au flush() (réécriture de la matrice)
+        self._pending: dict[str, tuple[str, dict, np.ndarray]] = {}
+        self._deleted: set[str] = set()
+
+    @property
+    def _matrix_path(self) -> str:
+        return os.path.join(self.persist_directory, "embeddings.f32")
+
+    @property
+    def _chunks_path(self) -> str:
+        return os.path.join(self.persist_directory, "chunks.json")
+
+    def has_persisted_index(self) -> bool:
+        return os.path.exists(self._chunks_path) and os.path.exists(self._matrix_path)
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.has_persisted_index():
+            return
+        with open(self._chunks_path, encoding="utf-8") as f:
+            data = json.load(f)
+        self._ids, self._texts, self._metadatas = data["ids"], data["texts"], data["metadatas"]
+        if self._ids:
+            self._matrix = np.memmap(self._matrix_path, dtype=np.float32, mode="r",
+                                     shape=(len(self._ids), data["dim"]))
+        logger.info(f"Index NumPy chargé: {len(self._ids)} chunks")
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    # -------------------------
+    # Primitives d'indexation incrémentale
+    # -------------------------
+    def existing_ids(self) -> set[str]:
+        self._load()
+        return (set(self._ids) | set(self._pending)) - self._deleted
+
+    def upsert(self, ids: list[str], texts: list[str], embeddings, metadatas: list[dict]):
+        self._load()
+        vectors = self._normalize(embeddings)
+        for i, chunk_id in enumerate(ids):
+            self._pending[chunk_id] = (texts[i], metadatas[i], vectors[i])
+            self._deleted.discard(chunk_id)
+
+    def delete(self, ids: list[str]):
+        self._load()
+        for chunk_id in ids:
+            self._pending.pop(chunk_id, None)
+            self._deleted.add(chunk_id)
+
+    def flush(self):
+        """Réécrit la matrice et les chunks de façon atomique, puis la remappe."""
+        if not self._pending and not self._deleted:
+            return
+        self._load()
+        rows = {
+            chunk_id: (self._texts[i], self._metadatas[i], np.array(self._matrix[i]))
+            for i, chunk_id in enumerate(self._ids)
+            if chunk_id not in self._deleted
+        }
+        rows.update(self._pending)
+        ids = list(rows)
+
+        os.makedirs(self.persist_directory, exist_ok=True)
+        dim = len(next(iter(rows.values()))[2]) if rows else 0
+        matrix = np.ascontiguousarray(
+            np.stack([rows[chunk_id][2] for chunk_id in ids]) if rows else np.zeros((0, dim)),
+            dtype=np.float32
+        )
+        # On libère l'ancien mapping avant de remplacer le fichier
+        self._matrix = None
+        matrix.tofile(f"{self._matrix_path}.tmp")
+        with open(f"{self._chunks_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump({
+                "dim": dim,
+                "ids": ids,
+                "texts": [rows[chunk_id][0] for chunk_id in ids],
+                "metadatas": [rows[chunk_id][1] for chunk_id in ids],
+            }, f, ensure_ascii=False)
+        os.replace(f"{self._matrix_path}.tmp", self._matrix_path)
+        os.replace(f"{self._chunks_path}.tmp", self._chunks_path)
+
+        self._pending.clear()
+        self._deleted.clear()
+        self._loaded = False
+        self._load()
+
+    async def index(self, documents: list[Document], embedder: Embedding) -> dict:
+        self.embedder = embedder
+        try:
+            return await self.index_incrementally(documents, embedder)
+        except Exception as e:
+            logger.error(f"Erreur d'indexation NumPy: {str(e)}", exc_info=True)
+            raise RuntimeError(f"Échec de l'indexation NumPy: {str(e)}")
+
+    async def retrieve(self, query: str, k: int = 3) -> list[str]:
+        return await self.retrieve_many([query], k)
+
+    async def retrieve_many(self, queries: list[str], k: int = 3) -> list[str]:
+        """Toutes les requêtes en un produit matriciel ; un chunk est classé par sa meilleure similarité."""
+        queries = list(dict.fromkeys(q for q in queries if q and q.strip()))
+        self._load()
+        if not queries or self._matrix is None or self.embedder is None:
+            if self._matrix is None:
+                logger.warning("Aucun index NumPy chargé")
+            return []
+
+        query_vectors = self._normalize(await self.embedder.embed(queries))
+        scores = (query_vectors @ self._matrix.T).max(axis=0)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [self._texts[i] for i in top]
@@ -0,0 +1,105 @@
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+logger = logging.getLogger("bm25")
+
+# Garde les noms techniques entiers : "pyspark", "c++", "c#", "node.js", "scikit-learn"
+_TOKEN = re.compile(r"\w[\w+#.\-]*")
+
+def tokenize(text: str) -> List[str]:
+    return [t.rstrip(".-") for t in _TOKEN.findall(text.casefold()) if t.rstrip(".-")]
+
+class BM25Index:
+    """Index lexical BM25 (Okapi) sur les mêmes chunks que l'index vectoriel.
+
+    Maintenu de façon incrémentale (mêmes IDs que Chroma) et persisté en JSON
+    à côté de chroma.sqlite3 ; les postings sont reconstruits au chargement.
+    """
+
+    def __init__(self, path: str, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.texts: Dict[str, str] = {}
+        self._lengths: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._total_length = 0
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def add(self, ids: Iterable[str], texts: Iterable[str]):
+        for chunk_id, text in zip(ids, texts):
+            if chunk_id in self.texts:
+                self._remove_one(chunk_id)
+            tokens = tokenize(text)
+            self.texts[chunk_id] = text
+            self._lengths[chunk_id] = len(tokens)
+            self._total_length += len(tokens)
+            for term, tf in Counter(tokens).items():
+                self._postings[term][chunk_id] = tf
+            self._dirty = True
+
+    def remove(self, ids: Iterable[str]):
+        for chunk_id in ids:
+            if chunk_id in self.texts:
+                self._remove_one(chunk_id)
+                self._dirty = True
+
+    def _remove_one(self, chunk_id: str):
+        for term in set(tokenize(self.texts.pop(chunk_id))):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(chunk_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(chunk_id)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        n = len(self.texts)
+        if n == 0:
+            return []
+        avg_length = self._total_length / n or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[chunk_id] / avg_length)
+                scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "texts": self.texts}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+        logger.info(f"Index BM25 sauvegardé ({len(self.texts)} chunks): {self.path}")
+
+    def load(self) -> bool:
+        if not self.exists():
+            return False
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.k1, self.b = data.get("k1", self.k1), data.get("b", self.b)
+        self.texts, self._lengths, self._total_length = {}, {}, 0
+        self._postings = defaultdict(dict)
+        texts = data.get("texts", {})
+        self.add(texts.keys(), texts.values())
+        self._dirty = False
+        return True
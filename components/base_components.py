@@ -1,6 +1,11 @@
 from abc import ABC, abstractmethod
+import asyncio
+import hashlib
+import logging
 from utils.models import Document
 
+logger = logging.getLogger("retriever")
+
 # ---------------- Reader ----------------
 class Reader(ABC):
     def __init__(self, name: str = "", description: str = ""):
@@ -45,6 +50,146 @@ class Retriever(ABC):
     async def retrieve(self, query: str, k: int = 3) -> list[str]:
         pass
 
+    async def retrieve_many(self, queries: list[str], k: int = 3) -> list[str]:
+        """Plusieurs variantes de requête, résultats dédupliqués et fusionnés (RRF).
+
+        Implémentation par défaut : une recherche par requête. Les backends
+        la surchargent pour embedder et chercher en un seul appel.
+        """
+        queries = list(dict.fromkeys(q for q in queries if q and q.strip()))
+        results = await asyncio.gather(*(self.retrieve(q, k) for q in queries))
+        return self.fuse_rankings(results, k)
+
+    @staticmethod
+    def fuse_rankings(rankings: list[list[str]], k: int, rrf_k: int = 60) -> list[str]:
+        """Reciprocal Rank Fusion : score = somme des 1 / (rrf_k + rang)."""
+        scores: dict[str, float] = {}
+        for ranking in rankings:
+            for rank, item in enumerate(ranking):
+                scores[item] = scores.get(item, 0.0) + 1.0 / (rrf_k + rank + 1)
+        return sorted(scores, key=scores.get, reverse=True)[:k]
+
+    # Primitives d'indexation incrémentale (utilisées par l'ingestion de corpus)
+    @abstractmethod
+    def existing_ids(self) -> set[str]:
+        pass
+
+    @abstractmethod
+    def upsert(self, ids: list[str], texts: list[str], embeddings, metadatas: list[dict]):
+        pass
+
+    @abstractmethod
+    def delete(self, ids: list[str]):
+        pass
+
+    def flush(self):
+        """Persiste les structures annexes après une passe d'indexation."""
+        pass
+
+    def has_persisted_index(self) -> bool:
+        return False
+
+    @staticmethod
+    def compute_version(ids) -> str:
+        """Digest de l'ensemble des chunks indexés (version de l'index)."""
+        return hashlib.sha256("\n".join(sorted(ids)).encode("utf-8")).hexdigest()
+
+    async def index_incrementally(
+        self,
+        documents,
+        embedder: Embedding,
+        batch_size: int = 64,
+        queue_size: int = 8
+    ) -> dict:
+        """Indexation incrémentale : n'embedde que les chunks nouveaux, supprime les obsolètes.
+
+        `documents` est une liste ou un itérable async de documents déjà découpés : les
+        nouveaux chunks partent à l'embedding par batchs (queue bornée) pendant que la
+        suite du corpus est encore lue.
+        """
+        existing = self.existing_ids()
+        seen: set[str] = set()
+        stats = {"added": 0}
+        queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        done = object()
+
+        async def produce():
+            pending = []
+            async for doc in _aiter(documents):
+                for chunk in doc.chunks:
+                    chunk_id = chunk.fingerprint(embedder.model_name)
+                    if chunk_id in seen:
+                        continue
+                    seen.add(chunk_id)
+                    if chunk_id in existing:
+                        continue
+                    pending.append((chunk_id, chunk.content, {
+                        **doc.metadata,
+                        "source": chunk.source or doc.source or "unknown",
+                        "chunk_id": chunk.chunk_id,
+                    }))
+                    if len(pending) >= batch_size:
+                        await queue.put(pending)
+                        pending = []
+            if pending:
+                await queue.put(pending)
+            await queue.put(done)
+
+        async def consume():
+            while (batch := await queue.get()) is not done:
+                ids = [item[0] for item in batch]
+                texts = [item[1] for item in batch]
+                embeddings = await embedder.embed(texts)
+                self.upsert(ids, texts, embeddings, [item[2] for item in batch])
+                stats["added"] += len(ids)
+
+        producer, consumer = asyncio.ensure_future(produce()), asyncio.ensure_future(consume())
+        try:
+            await asyncio.gather(producer, consumer)
+        except BaseException:
+            producer.cancel()
+            consumer.cancel()
+            raise
+
+        if not seen:
+            logger.warning("Aucun texte à indexer")
+            return {"added": 0, "deleted": 0, "unchanged": 0, "version": getattr(self, "index_version", None)}
+
+        stale_ids = [chunk_id for chunk_id in existing if chunk_id not in seen]
+        self.delete(stale_ids)
+        self.flush()
+        self.index_version = self.compute_version(seen)
+        logger.info(
+            f"Indexation {self.name}: {stats['added']} nouveaux chunks, "
+            f"{len(stale_ids)} obsolètes, {len(seen) - stats['added']} inchangés"
+        )
+        return {
+            "added": stats["added"],
+            "deleted": len(stale_ids),
+            "unchanged": len(seen) - stats["added"],
+            "version": self.index_version,
+        }
+
+
+async def _aiter(items):
+    """Parcourt indifféremment une liste ou un itérable async."""
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+# ---------------- Reranker ----------------
+class Reranker(ABC):
+    def __init__(self, name: str = "", description: str = ""):
+        self.name = name
+        self.description = description
+
+    @abstractmethod
+    async def rerank(self, query: str, candidates: list[str], k: int = 3) -> list[str]:
+        pass
+
 # ---------------- PromptStrategy ----------------
 class PromptStrategy(ABC):
     @abstractmethod
@@ -12,6 +12,67 @@ RAG_CONFIG = {
     "max_tokens": int(os.getenv("LLM_MAX_TOKENS", "512")),
     "chunk_size": int(os.getenv("CHUNK_SIZE", "1000")),
     "chunk_overlap": int(os.getenv("CHUNK_OVERLAP", "200")),
+    # Budgets de tokens du prompt (contexte empaqueté par pertinence, historique tronqué)
+    "context_token_budget": int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500")),
+    "history_token_budget": int(os.getenv("HISTORY_TOKEN_BUDGET", "500")),
+    # Messages conservés tels quels ; les plus anciens sont résumés en arrière-plan
+    "memory_keep_messages": int(os.getenv("MEMORY_KEEP_MESSAGES", "6")),
+    # Corpus indexé : fichiers, dossiers ou globs séparés par des virgules
+    "corpus_paths": os.getenv(
+        "CORPUS_PATHS", "data/raw/*.pdf,data/projects.json,data/recommandations.json"
+    ).split(","),
+    "ingestion_workers": int(os.getenv("INGESTION_WORKERS", "4")),
+    "ingestion_queue_size": int(os.getenv("INGESTION_QUEUE_SIZE", "8")),
+    "embed_batch_size": int(os.getenv("EMBED_BATCH_SIZE", "64")),
+    # Cache disque des embeddings (clé: modèle + hash du texte)
+    "embedding_cache_path": os.getenv("EMBEDDING_CACHE_PATH", "data/embedding_cache.sqlite3"),
+    "embedding_cache_size": int(os.getenv("EMBEDDING_CACHE_SIZE", "50000")),
+    # Cache des résultats de recherche (invalidé à chaque changement d'index)
+    "retrieval_cache_size": int(os.getenv("RETRIEVAL_CACHE_SIZE", "256")),
+    "retrieval_cache_ttl": float(os.getenv("RETRIEVAL_CACHE_TTL", "3600")),
+    "retrieval_k": int(os.getenv("RETRIEVAL_K", "3")),
+    # Rerank cross-encoder (CPU) entre retrieval et génération, avec budget de latence
+    "rerank_enabled": os.getenv("RERANK_ENABLED", "false").lower() == "true",
+    "rerank_model": os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+    "rerank_candidates": int(os.getenv("RERANK_CANDIDATES", "12")),
+    "rerank_budget_ms": float(os.getenv("RERANK_BUDGET_MS", "150")),
+    "rerank_batch_size": int(os.getenv("RERANK_BATCH_SIZE", "16")),
+    # Backend de recherche : "chroma" ou "numpy"
+    "retriever_backend": os.getenv("RETRIEVER_BACKEND", "chroma"),
+    # Recherche hybride BM25 + dense (fusion Reciprocal Rank Fusion)
+    "retrieval_hybrid": os.getenv("RETRIEVAL_HYBRID", "true").lower() == "true",
+    "retrieval_rrf_k": int(os.getenv("RETRIEVAL_RRF_K", "60")),
+    # Cache sémantique des réponses Mistral
+    "semantic_cache_enabled": os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true",
+    "semantic_cache_threshold": float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+    "semantic_cache_ttl": float(os.getenv("SEMANTIC_CACHE_TTL", "3600")),
+    "semantic_cache_size": int(os.getenv("SEMANTIC_CACHE_SIZE", "512")),
+    # Mode du chat RAG : "fast" (pas d'appel LLM de reformulation par tour) ou "full"
+    "chat_mode": os.getenv("CHAT_MODE", "fast"),
+    # Flux complet : retrieval spéculatif sur la question brute, timeout par étape (s)
+    "speculative_retrieval": os.getenv("SPECULATIVE_RETRIEVAL", "false").lower() == "true",
+    "step_timeout": float(os.getenv("STEP_TIMEOUT", "60")),
+    # API HTTP headless : requêtes pipeline simultanées et attente max avant 503 (s)
+    "api_max_concurrency": int(os.getenv("API_MAX_CONCURRENCY", "16")),
+    "api_queue_timeout": float(os.getenv("API_QUEUE_TIMEOUT", "10")),
+    # Évaluation des réponses en arrière-plan (file bornée, lots, écriture SQLite groupée)
+    "evaluation_enabled": os.getenv("EVALUATION_ENABLED", "false").lower() == "true",
+    "evaluation_db_path": os.getenv("EVALUATION_DB_PATH", "data/evaluations.sqlite3"),
+    "evaluation_queue_size": int(os.getenv("EVALUATION_QUEUE_SIZE", "1000")),
+    "evaluation_batch_size": int(os.getenv("EVALUATION_BATCH_SIZE", "32")),
+    # Traces TruLens : échantillonnage en tête, rétention en queue (lentes / erreurs / scores bas)
+    "trulens_enabled": os.getenv("TRULENS_ENABLED", "false").lower() == "true",
+    "trace_sample_rate": float(os.getenv("TRACE_SAMPLE_RATE", "0.05")),
+    "trace_slow_ms": float(os.getenv("TRACE_SLOW_MS", "5000")),
+    "trace_low_score": float(os.getenv("TRACE_LOW_SCORE", "0.5")),
+    # Enregistrements légers des requêtes lentes / en erreur (même base que les évaluations par défaut)
+    "trace_tail_db_path": os.getenv("TRACE_TAIL_DB_PATH", "data/evaluations.sqlite3"),
+    "trace_retention_days": float(os.getenv("TRACE_RETENTION_DAYS", "7")),
+    "trace_tail_retention_days": float(os.getenv("TRACE_TAIL_RETENTION_DAYS", "30")),
+    # Métriques Prometheus (latences par étape, tokens, caches, erreurs) ; port 0 = pas de serveur dédié
+    "metrics_enabled": os.getenv("METRICS_ENABLED", "false").lower() == "true",
+    "metrics_port": int(os.getenv("METRICS_PORT", "0")),
+    "metrics_textfile": os.getenv("METRICS_TEXTFILE", ""),
 }
 
 # Configuration des retries (désactivés par défaut pour un POC)
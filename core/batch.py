@@ -0,0 +1,204 @@
+"""Traitement par lots : matching de nombreuses fiches de poste contre le CV.
+
+Usage:
+    python -m core.batch requests.jsonl results.jsonl --concurrency 8
+
+Chaque ligne d'entrée est un objet JSON avec `request_id` et soit
+`question` (+ `qualification` optionnelle), soit `title`/`body` (fiche de
+poste). Les résultats sont ajoutés ligne à ligne au fichier de sortie (une
+ligne par requête, après sa dernière tentative), qui sert aussi de
+checkpoint : une relance ne retraite que les requêtes absentes ou en erreur.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+logger = logging.getLogger("batch")
+
+DEFAULT_QUESTION = "Le profil correspond-il à ce besoin ? Justifie en t'appuyant sur le CV."
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """429 / quota Mistral, d'après le code HTTP (httpx ou SDK mistralai), y compris en cause chaînée."""
+    while error is not None:
+        status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+        if status == 429:
+            return True
+        error = error.__cause__
+    return False
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_request(record: Dict[str, Any], line_number: int) -> Dict[str, Any]:
+    request_id = str(record.get("request_id") or record.get("id") or f"line-{line_number}")
+    qualification = record.get("qualification")
+    if not qualification:
+        qualification = {k: record[k] for k in ("title", "body") if record.get(k)}
+    return {
+        "request_id": request_id,
+        "question": record.get("question") or DEFAULT_QUESTION,
+        "qualification": qualification,
+    }
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        orchestrator,
+        concurrency: int = 8,
+        max_attempts: int = 6,
+        backoff_initial: float = 1.0,
+        backoff_max: float = 60.0,
+    ):
+        self.orchestrator = orchestrator
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        # Pause partagée : un 429 ralentit tous les workers, pas seulement celui qui l'a reçu
+        self._resume_at = 0.0
+        self._write_lock = asyncio.Lock()
+
+    @staticmethod
+    def load_requests(input_path: str) -> List[Dict[str, Any]]:
+        requests = []
+        with open(input_path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    requests.append(parse_request(json.loads(line), line_number))
+        return requests
+
+    @staticmethod
+    def load_checkpoint(output_path: str) -> Set[str]:
+        """IDs déjà traités avec succès (les erreurs seront rejouées).
+
+        Le fichier est réécrit avec ces seuls résultats : chaque requête rejouée n'y
+        laisse ensuite qu'une ligne, celle de sa dernière tentative.
+        """
+        done: Dict[str, str] = {}
+        if not os.path.exists(output_path):
+            return set()
+        with open(output_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    continue  # ligne tronquée par un arrêt brutal
+                if result.get("status") == "ok":
+                    done[result["request_id"]] = line if line.endswith("\n") else line + "\n"
+        tmp_path = output_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(done.values())
+        os.replace(tmp_path, output_path)
+        return set(done)
+
+    async def _wait_cooldown(self):
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _before_sleep(self, retry_state):
+        error = retry_state.outcome.exception()
+        delay = _retry_after(error) or retry_state.next_action.sleep
+        self._resume_at = max(self._resume_at, time.monotonic() + delay)
+        logger.warning(f"Rate limit Mistral, pause de {delay:.1f}s (tentative {retry_state.attempt_number})")
+
+    async def _process(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        attempts = 0
+        result = {"request_id": request["request_id"]}
+        try:
+            async for attempt in AsyncRetrying(
+                stop=stop_after_attempt(self.max_attempts),
+                wait=wait_exponential_jitter(initial=self.backoff_initial, max=self.backoff_max),
+                retry=retry_if_exception(is_rate_limited),
+                before_sleep=self._before_sleep,
+                reraise=True,
+            ):
+                with attempt:
+                    attempts += 1
+                    await self._wait_cooldown()
+                    state = await self.orchestrator.run_flow(request["question"], request["qualification"])
+            result.update({
+                "status": "ok",
+                "answer": state.answer,
+                "contexts": state.contexts,
+                "timings": state.timings,
+            })
+        except Exception as e:
+            logger.error(f"Échec de la requête {request['request_id']}: {e}")
+            result.update({"status": "error", "error": str(e)[:500]})
+        result["attempts"] = attempts
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    async def _write(self, output, result: Dict[str, Any]):
+        async with self._write_lock:
+            output.write(json.dumps(result, ensure_ascii=False) + "\n")
+            output.flush()
+
+    async def run(self, input_path: str, output_path: str) -> Dict[str, Any]:
+        requests = self.load_requests(input_path)
+        done = self.load_checkpoint(output_path)
+        todo = [r for r in requests if r["request_id"] not in done]
+        logger.info(f"Batch: {len(requests)} requêtes, {len(done)} déjà traitées, {len(todo)} à traiter")
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for request in todo:
+            queue.put_nowait(request)
+        stats = {"total": len(requests), "skipped": len(done), "ok": 0, "error": 0}
+        start = time.perf_counter()
+
+        with open(output_path, "a", encoding="utf-8") as output:
+            async def worker():
+                while True:
+                    try:
+                        request = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    result = await self._process(request)
+                    stats[result["status"]] += 1
+                    await self._write(output, result)
+
+            await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(todo)) or 1)))
+
+        stats["elapsed_s"] = round(time.perf_counter() - start, 1)
+        logger.info(f"Batch terminé: {stats}")
+        return stats
+
+
+async def _main(args):
+    from core.bootstrap_core import BootstrapCore
+    from core.dependencies import create_container
+
+    orchestrator = await BootstrapCore(create_container()).initialize()
+    runner = BatchRunner(
+        orchestrator,
+        concurrency=args.concurrency,
+        max_attempts=args.max_attempts,
+    )
+    return await runner.run(args.input, args.output)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Matching par lots de fiches de poste")
+    parser.add_argument("input", help="Fichier JSONL des requêtes")
+    parser.add_argument("output", help="Fichier JSONL des résultats (sert de checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-attempts", type=int, default=6)
+    print(json.dumps(asyncio.run(_main(parser.parse_args()))))
@@ -3,14 +3,17 @@ import asyncio
 import json
 import hashlib
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from tenacity import (
     retry, stop_after_attempt, wait_exponential,
     retry_if_exception_type, before_sleep
 )
 from core.dependencies import Container
+from core.ingestion import resolve_corpus
 from core.orchestrator import Orchestrator
 from core.qualification import QUESTIONS
+from monitoring.feedback import embedding_scorers
+from monitoring import sampling, metrics
 from config.settings import RAG_CONFIG, RETRY_CONFIG
 
 logger = logging.getLogger("bootstrap")
@@ -35,32 +38,74 @@ class BootstrapCore:
         self.container = container
         self._validate_dependencies()
 
+    def _corpus_paths(self) -> List[str]:
+        """Fichiers du corpus : globs configurés plus le PDF explicite (pdf_path, ex: surcharge de l'app)."""
+        patterns = [*(self.container.config.corpus_paths() or []), self.container.config.pdf_path()]
+        return resolve_corpus(p for p in patterns if p)
+
     def _validate_dependencies(self):
         """Valide que toutes les dépendances sont disponibles."""
-        if not os.path.exists(self.container.config.pdf_path()):
-            raise PDFLoadError(f"PDF introuvable: {self.container.config.pdf_path()}")
+        if not self._corpus_paths():
+            raise PDFLoadError(
+                f"Aucun document à indexer: {self.container.config.corpus_paths()} / {self.container.config.pdf_path()}"
+            )
         if not self.container.config.mistral_api_key():
             raise BootstrapError("Clé API Mistral manquante")
 
-    def _get_pdf_hash(self) -> str:
-        """Calcule le hash du PDF pour détecter les modifications."""
-        with open(self.container.config.pdf_path(), "rb") as f:
-            return hashlib.md5(f.read()).hexdigest()
+    def _get_corpus_hash(self) -> str:
+        """Calcule le hash du corpus (chemins + contenus) pour détecter les modifications."""
+        digest = hashlib.md5()
+        for path in self._corpus_paths():
+            digest.update(path.encode("utf-8"))
+            with open(path, "rb") as f:
+                digest.update(hashlib.md5(f.read()).digest())
+        return digest.hexdigest()
+
+    def corpus_fingerprint(self) -> str:
+        """Empreinte bon marché du corpus (chemins, tailles, dates) pour détecter un changement."""
+        digest = hashlib.md5()
+        for path in self._corpus_paths():
+            stat = os.stat(path)
+            digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _metadata_path(self) -> str:
+        """metadata.json vit dans le répertoire du backend de recherche sélectionné."""
+        return os.path.join(self.container.retriever().persist_directory, "metadata.json")
 
     def _save_metadata(self, metadata: Dict[str, Any]):
         """Sauvegarde les métadonnées de l'index."""
-        os.makedirs("data/chroma_index", exist_ok=True)
-        with open("data/chroma_index/metadata.json", "w") as f:
+        metadata_path = self._metadata_path()
+        os.makedirs(os.path.dirname(metadata_path), exist_ok=True)
+        with open(metadata_path, "w") as f:
             json.dump(metadata, f)
 
     def _load_metadata(self) -> Optional[Dict[str, Any]]:
         """Charge les métadonnées de l'index si elles existent."""
-        metadata_path = "data/chroma_index/metadata.json"
+        metadata_path = self._metadata_path()
         if os.path.exists(metadata_path):
             with open(metadata_path) as f:
                 return json.load(f)
         return None
 
+    def _index_config(self) -> Dict[str, Any]:
+        """Paramètres dont dépend le contenu de l'index (modèle + découpage)."""
+        return {
+            "embedder": self.container.config.embedder_model(),
+            "chunk_size": self.container.config.chunk_size(),
+            "chunk_overlap": self.container.config.chunk_overlap(),
+        }
+
+    def _is_index_reusable(self, metadata: Optional[Dict[str, Any]], current_hash: str) -> bool:
+        """Vérifie que l'index persisté correspond au corpus et à la configuration courante."""
+        if not metadata or metadata.get("corpus_hash") != current_hash:
+            return False
+        for key, value in self._index_config().items():
+            if metadata.get(key) != value:
+                logger.info(f"Index Chroma obsolète ({key}: {metadata.get(key)} -> {value})")
+                return False
+        return self.container.retriever().has_persisted_index()
+
     @retry(
         stop=stop_after_attempt(RETRY_CONFIG["max_attempts"]),
         wait=wait_exponential(
@@ -73,48 +118,59 @@ class BootstrapCore:
             f"Retry {retry_state.attempt_number} for {retry_state.fn.__name__}"
         ) if RETRY_CONFIG["log_retries"] else None
     )
-    async def _index_documents(self):
-        """Indexe les documents dans Chroma avec retry exponentiel."""
+    async def _index_documents(self) -> Dict[str, Any]:
+        """Indexe (de façon incrémentale) les documents dans Chroma avec retry exponentiel."""
         try:
-            logger.info("Chargement du PDF...")
-            docs = await asyncio.wait_for(
-                self.container.reader().load(self.container.config.pdf_path()),
-                timeout=10.0
-            )
-
-            logger.info("Chunking des documents...")
-            docs = await asyncio.wait_for(
-                self.container.chunker().chunk(docs),
-                timeout=10.0
-            )
-
-            logger.info("Indexation dans Chroma...")
-            await asyncio.wait_for(
-                self.container.retriever().index(docs, self.container.embedder()),
-                timeout=30.0
+            logger.info("Ingestion du corpus...")
+            return await asyncio.wait_for(
+                self.container.ingestor().ingest(self._corpus_paths()),
+                timeout=120.0
             )
 
         except asyncio.TimeoutError:
-            raise ChromaIndexError("Timeout lors de l'indexation (30s)")
+            raise ChromaIndexError("Timeout lors de l'indexation (120s)")
         except Exception as e:
             raise ChromaIndexError(f"Échec de l'indexation: {e}")
 
+    def _configure_metrics(self):
+        """Active les métriques (avant l'indexation, pour mesurer lecture et chunking)."""
+        config = self.container.config
+        if not config.metrics_enabled():
+            return
+        metrics.enable()
+        # Compteurs hit/miss lus au moment de l'export
+        metrics.register_cache("embedding", self.container.embedding_cache().stats)
+        metrics.register_cache("semantic", self.container.semantic_cache().stats)
+        result_cache = getattr(self.container.retriever(), "result_cache", None)
+        if result_cache is not None:
+            metrics.register_cache("retrieval", result_cache.stats)
+        if config.metrics_port():
+            metrics.start_http_server(config.metrics_port())
+        if config.metrics_textfile():
+            metrics.start_textfile_writer(config.metrics_textfile())
+
     async def initialize(self):
         """Initialise le pipeline RAG avec gestion des états et cache."""
         try:
-            current_hash = self._get_pdf_hash()
+            self._configure_metrics()
+            current_hash = self._get_corpus_hash()
             metadata = self._load_metadata()
 
-            if metadata and metadata.get("pdf_hash") == current_hash:
+            if self._is_index_reusable(metadata, current_hash):
+                # La collection est ouverte paresseusement au premier retrieve()
                 logger.info("Utilisation de l'index Chroma existant.")
+                self.container.retriever().index_version = metadata.get("index_digest")
                 return self._create_pipeline()
 
-            await self._index_documents()
+            # Le hash du corpus ne sert que de raccourci : seuls les chunks modifiés sont ré-embeddés
+            stats = await self._index_documents()
             self._save_metadata({
-                "pdf_hash": current_hash,
+                "corpus_hash": current_hash,
+                "documents": stats["documents"],
+                "index_digest": stats["version"],
                 "timestamp": asyncio.get_event_loop().time(),
-                "embedder": RAG_CONFIG["embedder_model"],
-                "llm_model": RAG_CONFIG["llm_model"]
+                **self._index_config(),
+                "llm_model": self.container.config.llm_model() or RAG_CONFIG["llm_model"]
             })
             return self._create_pipeline()
 
@@ -127,9 +183,48 @@ class BootstrapCore:
 
     def _create_pipeline(self):
         """Crée et retourne le pipeline RAG."""
-        return Orchestrator(
+        # Les feedbacks (TruLens et worker d'évaluation) réutilisent le modèle d'embedding déjà chargé
+        embedding_scorers.configure(self.container.embedder())
+        sampling.configure(
+            rate=self.container.config.trace_sample_rate(),
+            slow_ms=self.container.config.trace_slow_ms(),
+            tail_db_path=self.container.config.trace_tail_db_path()
+        )
+        orchestrator = Orchestrator(
             questions=QUESTIONS,
             retriever=self.container.retriever(),
             reform_gen=self.container.reform_gen(),
             commercial_gen=self.container.commercial_gen(),
+            chat_mode=self.container.config.chat_mode(),
+            speculative_retrieval=self.container.config.speculative_retrieval(),
+            step_timeout=self.container.config.step_timeout(),
+            reranker=self._warm_reranker(),
+            retrieval_k=self.container.config.retrieval_k(),
+            rerank_candidates=self.container.config.rerank_candidates(),
+            evaluator=self.container.evaluation_worker() if self.container.config.evaluation_enabled() else None,
+        )
+        orchestrator.tru_app = self._create_tru_app(orchestrator)
+        return orchestrator
+
+    def _warm_reranker(self):
+        """Cross-encoder chargé dès le bootstrap ; en cas d'échec, l'ordre vectoriel est conservé."""
+        if not self.container.config.rerank_enabled():
+            return None
+        reranker = self.container.reranker()
+        try:
+            reranker.warm_up()
+        except Exception as e:
+            logger.warning(f"Préchargement du reranker impossible: {e}")
+        return reranker
+
+    def _create_tru_app(self, orchestrator: Orchestrator):
+        """Enregistrement TruLens des traces échantillonnées (les scores restent au worker d'évaluation)."""
+        if not self.container.config.trulens_enabled():
+            return None
+        from trulens.apps.app import TruApp
+        from monitoring.session import tru  # noqa: F401  (session partagée, base TruLens)
+        return TruApp(
+            orchestrator,
+            app_name="Smart_CV",
+            app_version=self.container.config.llm_model() or RAG_CONFIG["llm_model"]
         )
@@ -2,13 +2,23 @@ from dependency_injector import containers, providers
 from components.Reader.PdfReader import PDFReader
 from components.Chunker.RecursiveChunker import RecursiveChunker
 from components.Embedder.HF_embedder import HFEmbedding
+from components.Embedder.embedding_cache import EmbeddingCache
 from components.Retriever.Chroma_retriever import ChromaRetriever
+from components.Retriever.Numpy_retriever import NumpyRetriever
+from components.Reranker.CrossEncoderReranker import CrossEncoderReranker
 from components.Generator.MistralGenerator import LLMGenerator
+from components.Generator.semantic_cache import SemanticCache
+from core.ingestion import CorpusIngestor
+from components.Prompt_Strategy.context_packer import ContextPacker
 from components.Prompt_Strategy.commercial_prompt import (
     CommercialQualificationPrompt,
     ReformulationPrompt,
+    ConversationSummaryPrompt,
 )
+from core.memory import ConversationMemory
+from monitoring.feedback.evaluation_worker import EvaluationWorker
 from langchain_mistralai import ChatMistralAI
+from config.settings import RAG_CONFIG, MISTRAL_API_KEY
 
 class Container(containers.DeclarativeContainer):
     config = providers.Configuration()
@@ -20,13 +30,52 @@ class Container(containers.DeclarativeContainer):
         chunk_size=config.chunk_size,
         chunk_overlap=config.chunk_overlap
     )
+    embedding_cache = providers.Singleton(
+        EmbeddingCache,
+        path=config.embedding_cache_path,
+        max_entries=config.embedding_cache_size
+    )
     embedder = providers.Singleton(
         HFEmbedding,
-        model_name=config.embedder_model
+        model_name=config.embedder_model,
+        cache=embedding_cache
+    )
+    # Backend de recherche : "chroma" (défaut) ou "numpy" (recherche exacte, petits corpus)
+    retriever = providers.Selector(
+        config.retriever_backend,
+        chroma=providers.Singleton(
+            ChromaRetriever,
+            persist_directory="data/chroma_index",
+            embedder=embedder,
+            cache_size=config.retrieval_cache_size,
+            cache_ttl=config.retrieval_cache_ttl,
+            hybrid=config.retrieval_hybrid,
+            rrf_k=config.retrieval_rrf_k
+        ),
+        numpy=providers.Singleton(
+            NumpyRetriever,
+            persist_directory="data/numpy_index",
+            embedder=embedder
+        ),
     )
-    retriever = providers.Singleton(
-        ChromaRetriever,
-        persist_directory="data/chroma_index"
+
+    # Rerank cross-encoder optionnel (activé par config.rerank_enabled)
+    reranker = providers.Singleton(
+        CrossEncoderReranker,
+        model_name=config.rerank_model,
+        budget_ms=config.rerank_budget_ms,
+        batch_size=config.rerank_batch_size
+    )
+
+    # Ingestion multi-documents (lecture / chunking / embedding en parallèle)
+    ingestor = providers.Factory(
+        CorpusIngestor,
+        chunker=chunker,
+        embedder=embedder,
+        retriever=retriever,
+        max_workers=config.ingestion_workers,
+        queue_size=config.ingestion_queue_size,
+        batch_size=config.embed_batch_size
     )
 
     # LLM Mistral
@@ -40,7 +89,24 @@ class Container(containers.DeclarativeContainer):
 
     # Prompt Strategies
     reformulation_prompt = providers.Singleton(ReformulationPrompt)
-    commercial_prompt = providers.Singleton(CommercialQualificationPrompt)
+    summary_prompt = providers.Singleton(ConversationSummaryPrompt)
+    context_packer = providers.Singleton(
+        ContextPacker,
+        context_budget=config.context_token_budget,
+        history_budget=config.history_token_budget,
+        chunk_overlap=config.chunk_overlap
+    )
+    commercial_prompt = providers.Singleton(CommercialQualificationPrompt, packer=context_packer)
+
+    # Cache sémantique des réponses (questions quasi identiques, même contexte)
+    semantic_cache = providers.Singleton(
+        SemanticCache,
+        embedder=embedder,
+        threshold=config.semantic_cache_threshold,
+        ttl=config.semantic_cache_ttl,
+        max_entries=config.semantic_cache_size,
+        enabled=config.semantic_cache_enabled
+    )
 
     # Générateurs
     reform_gen = providers.Singleton(
@@ -51,5 +117,35 @@ class Container(containers.DeclarativeContainer):
     commercial_gen = providers.Singleton(
         LLMGenerator,
         llm=llm,
-        prompt_strategy=commercial_prompt
+        prompt_strategy=commercial_prompt,
+        cache=semantic_cache
     )
+    summary_gen = providers.Singleton(
+        LLMGenerator,
+        llm=llm,
+        prompt_strategy=summary_prompt
+    )
+
+    # Évaluation des réponses en arrière-plan (activée par config.evaluation_enabled)
+    evaluation_worker = providers.Singleton(
+        EvaluationWorker,
+        db_path=config.evaluation_db_path,
+        queue_size=config.evaluation_queue_size,
+        batch_size=config.evaluation_batch_size
+    )
+
+    # Mémoire de conversation (une instance par session)
+    memory = providers.Factory(
+        ConversationMemory,
+        summarizer=summary_gen,
+        keep_messages=config.memory_keep_messages
+    )
+
+
+def create_container(overrides: dict | None = None) -> Container:
+    """Construit un conteneur configuré (valeurs par défaut + surcharges de l'appelant)."""
+    container = Container()
+    container.config.from_dict({**RAG_CONFIG, "mistral_api_key": MISTRAL_API_KEY})
+    if overrides:
+        container.config.from_dict(overrides)
+    return container
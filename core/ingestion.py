@@ -0,0 +1,112 @@
+import asyncio
+import glob
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from components.Reader.JsonReader import load_json_records
+from components.Reader.PdfReader import load_pdf_pages
+from utils.models import Document
+from monitoring import metrics
+
+logger = logging.getLogger("ingestion")
+
+# Parseurs bloquants par extension (fonctions de module : picklables pour le process pool)
+PARSERS: Dict[str, Callable[[str], List[Tuple[str, dict]]]] = {
+    ".pdf": load_pdf_pages,
+    ".json": load_json_records,
+}
+
+
+def resolve_corpus(patterns: Iterable[str]) -> List[str]:
+    """Résout une liste de fichiers, dossiers ou globs en fichiers supportés (ordre stable)."""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "**", "*")
+        for path in glob.glob(pattern, recursive=True):
+            if os.path.isfile(path) and os.path.splitext(path)[1].lower() in PARSERS:
+                paths.add(os.path.normpath(path))
+    return sorted(paths)
+
+
+def parse_file(path: str) -> List[Tuple[str, dict]]:
+    return PARSERS[os.path.splitext(path)[1].lower()](path)
+
+
+def timed_parse_file(path: str) -> Tuple[float, List[Tuple[str, dict]]]:
+    """parse_file chronométré dans le process worker (hors attente du pool)."""
+    start = time.perf_counter()
+    records = parse_file(path)
+    return (time.perf_counter() - start) * 1000, records
+
+
+class CorpusIngestor:
+    """Ingestion d'un corpus multi-documents.
+
+    Lecture dans un process pool, chunking dès qu'un document est parsé, et
+    embedding par batchs alimentés via une queue bornée (Retriever.index_incrementally) :
+    les trois étapes se recouvrent au lieu de s'exécuter séquentiellement.
+    """
+
+    def __init__(
+        self,
+        chunker,
+        embedder,
+        retriever,
+        max_workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ):
+        self.chunker = chunker
+        self.embedder = embedder
+        self.retriever = retriever
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.queue_size = queue_size or 8
+        self.batch_size = batch_size or 64
+
+    async def _documents(self, paths: List[str]) -> AsyncIterator[Document]:
+        """Parse en parallèle et produit les documents découpés au fil de l'eau."""
+        loop = asyncio.get_running_loop()
+
+        async def parse(pool, path):
+            elapsed_ms, records = await loop.run_in_executor(pool, timed_parse_file, path)
+            metrics.observe_stage(f"parse_{os.path.splitext(path)[1].lstrip('.').lower()}", elapsed_ms)
+            return path, records
+
+        # spawn : on ne fork pas un process qui a déjà chargé torch
+        with ProcessPoolExecutor(
+            max_workers=min(self.max_workers, len(paths)),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            for parsed in asyncio.as_completed([parse(pool, path) for path in paths]):
+                path, records = await parsed
+                docs = [Document(content, source=path, metadata=metadata) for content, metadata in records]
+                with metrics.timer("chunking"):
+                    docs = await self.chunker.chunk(docs)
+                for doc in docs:
+                    yield doc
+
+    async def ingest(self, patterns: Iterable[str]) -> Dict[str, Any]:
+        patterns = list(patterns)
+        paths = resolve_corpus(patterns)
+        if not paths:
+            raise FileNotFoundError(f"Aucun document trouvé pour: {patterns}")
+        logger.info(f"Ingestion de {len(paths)} documents...")
+
+        # Diff ajout / suppression délégué au retriever, alimenté pendant la lecture
+        stats = await self.retriever.index_incrementally(
+            self._documents(paths),
+            self.embedder,
+            batch_size=self.batch_size,
+            queue_size=self.queue_size,
+        )
+        stats["documents"] = len(paths)
+        logger.info(
+            f"Ingestion terminée: +{stats['added']} / -{stats['deleted']} chunks "
+            f"({stats['unchanged']} inchangés)"
+        )
+        return stats
@@ -0,0 +1,89 @@
+from typing import Dict, List, Optional
+from concurrent.futures import Future
+import asyncio
+import logging
+import threading
+from utils.event_loop import get_loop
+
+logger = logging.getLogger("memory")
+
+SUMMARY_ROLE = "summary"
+
+
+class ConversationMemory:
+    """
+    Mémoire de conversation d'une session :
+    - les N derniers messages sont conservés tels quels ;
+    - les plus anciens sont condensés dans un résumé glissant, calculé en
+      arrière-plan sur la boucle partagée après chaque réponse (hors chemin critique).
+    """
+
+    def __init__(self, summarizer, keep_messages: int = 6):
+        # Pas d'appel à super().__init__()
+        self.name = "Conversation Memory"
+        self.description = "Recent turns verbatim plus a rolling summary of older turns"
+        self.summarizer = summarizer
+        self.keep_messages = keep_messages
+        self.summary = ""
+        self._summarized = 0  # nombre de messages déjà intégrés au résumé
+        self._pending: Optional[Future] = None
+        self._epoch = 0  # incrémenté par reset() : invalide les résumés en vol
+        self._lock = threading.Lock()
+
+    def window(self, messages: List[Dict]) -> List[Dict]:
+        """Conversation à envoyer au prompt : résumé + derniers messages (taille quasi constante)."""
+        recent = list(messages[-self.keep_messages:]) if self.keep_messages else []
+        with self._lock:
+            summary = self.summary
+        if not summary:
+            return recent
+        return [{"role": SUMMARY_ROLE, "content": summary}, *recent]
+
+    def update(self, messages: List[Dict]) -> Optional[Future]:
+        """Planifie (sans attendre) l'intégration des messages sortis de la fenêtre au résumé."""
+        if len(messages) < self._summarized:
+            # Conversation repartie de zéro (ou tronquée) : l'ancien résumé ne la décrit plus
+            self.reset()
+        upto = len(messages) - self.keep_messages
+        with self._lock:
+            if upto <= self._summarized:
+                return None
+            if self._pending is not None and not self._pending.done():
+                # Un résumé est déjà en cours : les messages seront repris au prochain tour
+                return self._pending
+            older = [dict(m) for m in messages[self._summarized:upto]]
+            previous = self.summary
+            self._pending = asyncio.run_coroutine_threadsafe(
+                self._fold(previous, older, upto, self._epoch), get_loop()
+            )
+            return self._pending
+
+    async def _fold(self, previous: str, older: List[Dict], upto: int, epoch: int):
+        transcript = "\n".join(f"{m.get('role', '')}: {m.get('content', '')}" for m in older)
+        try:
+            summary = await self.summarizer.generate(
+                transcript,
+                [previous] if previous else [],
+                None,
+                use_cache=False
+            )
+        except Exception as e:
+            # Le résumé n'est pas critique : on réessaiera au prochain tour
+            logger.warning(f"⚠️ Résumé de conversation échoué: {e}")
+            return
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            self.summary = summary.strip()
+            self._summarized = upto
+        logger.debug(f"🧠 Résumé mis à jour ({upto} messages condensés, {len(self.summary)} caractères)")
+
+    def reset(self):
+        """Oublie le résumé (nouvelle conversation) et invalide un résumé en cours."""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.cancel()
+            self.summary = ""
+            self._summarized = 0
+            self._pending = None
+            self._epoch += 1
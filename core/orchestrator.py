@@ -1,20 +1,60 @@
-from typing import List, Tuple, Dict, Optional
+from typing import List, Tuple, Dict, Optional, Iterator, AsyncIterator
 import logging
-import asyncio
+import time
+import uuid
 from core.steps.qualification_step import QualificationStep
 from core.steps.reformulation_step import ReformulationStep
 from core.steps.retrieval_step import RetrievalStep
 from core.steps.generation_step import GenerationStep
+from core.steps.rerank_step import RerankStep
 from core.state import RAGState
+from flow.pipeline import Pipeline
+from utils.event_loop import run_sync, iterate_sync
+from utils.cache import TTLCache
+from monitoring.sampling import get_sampler, record_trace
+from monitoring import metrics
 
 logger = logging.getLogger(__name__)
 
 class Orchestrator:
-    def __init__(self, questions: List[Tuple[str, str]], retriever, reform_gen, commercial_gen):
+    def __init__(
+        self,
+        questions: List[Tuple[str, str]],
+        retriever,
+        reform_gen,
+        commercial_gen,
+        chat_mode: str | None = None,
+        speculative_retrieval: bool | None = False,
+        step_timeout: float | None = None,
+        reranker=None,
+        retrieval_k: int | None = None,
+        rerank_candidates: int | None = None,
+        evaluator=None
+    ):
+        retrieval_k = retrieval_k or 3
         self.qualification = QualificationStep(questions)
         self.reformulation = ReformulationStep(reform_gen)
-        self.retrieval = RetrievalStep(retriever)
+        # Avec un reranker, on récupère un ensemble de candidats plus large puis on garde les k meilleurs
+        self.retrieval = RetrievalStep(
+            retriever,
+            k=(rerank_candidates or 4 * retrieval_k) if reranker is not None else retrieval_k
+        )
+        self.rerank = RerankStep(reranker, k=retrieval_k) if reranker is not None else None
         self.generation = GenerationStep(commercial_gen)
+        # "fast" : pas d'appel LLM ; retrieval sur la question brute, plus la reformulation si déjà en cache
+        # "full" : reformulation (calculée une fois par qualification) utilisée comme requête
+        self.chat_mode = chat_mode or "fast"
+        self._reformulations = TTLCache(max_size=1024, ttl=None)
+        # Worker d'évaluation en arrière-plan (optionnel) : soumission non bloquante après chaque réponse
+        self.evaluator = evaluator
+        # Application TruLens (optionnelle) : seules les requêtes échantillonnées sont enregistrées
+        self.tru_app = None
+        # Flux complet en DAG : en mode spéculatif, retrieval et reformulation tournent en parallèle
+        self.flow = Pipeline(
+            [step for step in (self.reformulation, self.retrieval, self.rerank, self.generation) if step],
+            default_timeout=step_timeout,
+            speculative=bool(speculative_retrieval)
+        )
 
     def generate_sync(self, question: str, context: List[str], conversation: List[Dict] | None = None) -> str:
         """Méthode synchrone pour Streamlit - comme dans l'ancienne version"""
@@ -22,15 +62,10 @@ class Orchestrator:
 
     def start_qualification_sync(self) -> str:
         """Version synchrone du démarrage de qualification"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            state = RAGState()
-            return loop.run_until_complete(
-                self.qualification.start(state)
-            )
-        finally:
-            loop.close()
+        return run_sync(self.start_qualification())
+
+    async def start_qualification(self) -> str:
+        return await self.qualification.start(RAGState())
 
     def get_next_qualification_question(self, QUESTIONS, current_step: int) -> str:
         """Retourne simplement la question suivante"""
@@ -40,55 +75,207 @@ class Orchestrator:
 
     def process_qualification_response_sync(self, response: str, current_step: int) -> str:
         """Version synchrone du traitement des réponses"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            state = RAGState()
-            state.current_step = current_step
-            state.qualification = {}
-            return loop.run_until_complete(
-                self.qualification.next(state, response)
-            )
-        finally:
-            loop.close()
+        return run_sync(self.process_qualification_response(response, current_step))
+
+    async def process_qualification_response(self, response: str, current_step: int) -> Optional[str]:
+        state = RAGState()
+        state.current_step = current_step
+        state.qualification = {}
+        return await self.qualification.next(state, response)
 
     def reformulate_sync(self, qualification_text: str) -> str:
         """Version synchrone de la reformulation"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            state = RAGState(qualification_text=qualification_text)
-            result = loop.run_until_complete(
-                self.reformulation.run(state)
-            )
-            return result.reformulated
-        finally:
-            loop.close()
+        return run_sync(self.reformulate(qualification_text))
+
+    async def reformulate(self, qualification_text: str) -> str:
+        """Reformulation mise en cache : un seul appel LLM par qualification"""
+        cached = self._reformulations.get(qualification_text)
+        if cached is not None:
+            return cached
+        state = await self.reformulation.run(RAGState(qualification_text=qualification_text))
+        self._reformulations.set(qualification_text, state.reformulated)
+        return state.reformulated
 
     def generate_sync(self, question: str, context: List[str], conversation: List[Dict] | None = None) -> str:
         """Version ultra-simple qui délègue au générateur"""
         return self.generation.generator.generate_sync(question, context, conversation)
 
+    def reformulate_stream_sync(self, qualification_text: str) -> Iterator[str]:
+        """Streaming des tokens de la reformulation (pour st.write_stream)"""
+        return iterate_sync(self._reformulate_stream(qualification_text))
 
-    def full_chat_flow_sync(self, question: str, qualification: Dict[str, str]) -> str:
-        """Version synchrone du flux complet"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+    async def _reformulate_stream(self, qualification_text: str) -> AsyncIterator[str]:
+        cached = self._reformulations.get(qualification_text)
+        if cached is not None:
+            yield cached
+            return
+        parts = []
+        async for token in self.reformulation.reform_gen.generate_stream(
+            question=qualification_text,
+            context=[],
+            conversation=[]
+        ):
+            parts.append(token)
+            yield token
+        self._reformulations.set(qualification_text, "".join(parts))
+
+    # -------------------------
+    # Chat RAG (reformulation en cache -> retrieval -> génération)
+    # -------------------------
+    async def prepare_chat(
+        self,
+        question: str,
+        qualification: Dict[str, str],
+        conversation: List[Dict] | None = None,
+        mode: str | None = None
+    ) -> RAGState:
+        """Prépare un tour de chat : reformulation (cache) et retrieval, avec chronométrage"""
+        mode = mode or self.chat_mode
+        qualification_text = "\n".join(f"{k}: {v}" for k, v in qualification.items())
+        state = RAGState(
+            question=question,
+            qualification=qualification,
+            qualification_text=qualification_text,
+            conversation=conversation or [],
+            started_at=time.perf_counter()
+        )
+
+        if mode == "full":
+            start = time.perf_counter()
+            state.reformulated = await self.reformulate(qualification_text)
+            state.timings["reformulation"] = (time.perf_counter() - start) * 1000
+        else:
+            # Pas d'appel LLM : une reformulation déjà en cache sert de variante de requête
+            state.reformulated = self._reformulations.get(qualification_text)
+
+        start = time.perf_counter()
+        state = await self.retrieval.run(state)
+        state.timings["retrieval"] = (time.perf_counter() - start) * 1000
+
+        if self.rerank is not None:
+            start = time.perf_counter()
+            state = await self.rerank.run(state)
+            state.timings["rerank"] = (time.perf_counter() - start) * 1000
+        return state
+
+    def _chat_context(self, state: RAGState) -> List[str]:
+        return [state.qualification_text, *state.contexts]
+
+    def _record_turn(self, state: RAGState, error: Exception | None = None):
+        """Fin d'un tour : métriques par étape, rétention en queue puis soumission (non bloquante) à l'évaluation."""
+        metrics.observe_timings(state.timings)
+        if error is not None:
+            metrics.inc("smartcv_errors_total", component="pipeline")
+        latency_ms = state.timings.get("total")
+        error_text = repr(error) if error is not None else None
+        record_id = uuid.uuid4().hex
         try:
-            state = RAGState(
-                question=question,
-                qualification=qualification,
-                qualification_text="\n".join(f"{k}: {v}" for k, v in qualification.items())
+            # Rétention en queue : les requêtes lentes ou en erreur laissent toujours un enregistrement
+            keep = get_sampler().retain(
+                record_id, latency_ms=latency_ms, error=error_text,
+                question=state.question, timings=state.timings
             )
+            if self.evaluator is not None:
+                self.evaluator.submit(
+                    question=state.question,
+                    answer=state.answer,
+                    contexts=state.contexts,
+                    latency_ms=latency_ms,
+                    error=error_text,
+                    record_id=record_id,
+                    force=keep
+                )
+        except Exception as e:
+            # Le monitoring ne doit jamais faire échouer un tour de chat
+            logger.warning(f"Enregistrement du tour impossible: {e}")
 
-            # Exécution séquentielle synchrone
-            state = loop.run_until_complete(self.reformulation.run(state))
-            state = loop.run_until_complete(self.retrieval.run(state))
-            state = loop.run_until_complete(self.generation.run(state))
+    async def chat(
+        self,
+        question: str,
+        qualification: Dict[str, str],
+        conversation: List[Dict] | None = None,
+        mode: str | None = None
+    ) -> RAGState:
+        """Tour de chat complet ; la réponse et les durées par étape sont dans l'état retourné"""
+        with record_trace(self.tru_app):
+            state = await self.prepare_chat(question, qualification, conversation, mode)
+            start = time.perf_counter()
+            state.answer = await self.generation.generator.generate(
+                question=state.question,
+                context=self._chat_context(state),
+                conversation=state.conversation
+            )
+            state.timings["generation"] = (time.perf_counter() - start) * 1000
+            state.timings["total"] = (time.perf_counter() - state.started_at) * 1000
+            self._record_turn(state)
+        return state
 
-            return state.answer
-        finally:
-            loop.close()
+    def prepare_chat_sync(
+        self,
+        question: str,
+        qualification: Dict[str, str],
+        conversation: List[Dict] | None = None,
+        mode: str | None = None
+    ) -> RAGState:
+        return run_sync(self.prepare_chat(question, qualification, conversation, mode))
+
+    def stream_answer_sync(self, state: RAGState) -> Iterator[str]:
+        """Streaming de la réponse d'un état préparé ; remplit answer et timings à la fin"""
+        return iterate_sync(self.stream_answer(state))
+
+    async def stream_answer(self, state: RAGState) -> AsyncIterator[str]:
+        with record_trace(self.tru_app):
+            start = time.perf_counter()
+            parts = []
+            async for token in self.generation.generator.generate_stream(
+                question=state.question,
+                context=self._chat_context(state),
+                conversation=state.conversation
+            ):
+                if not parts:
+                    state.timings["first_token"] = (time.perf_counter() - start) * 1000
+                parts.append(token)
+                yield token
+            state.answer = "".join(parts)
+            state.timings["generation"] = (time.perf_counter() - start) * 1000
+            # Durée réelle depuis prepare_chat (inclut l'attente entre préparation et streaming)
+            state.timings["total"] = (time.perf_counter() - (state.started_at or start)) * 1000
+            self._record_turn(state)
+
+
+    def full_chat_flow_sync(self, question: str, qualification: Dict[str, str]) -> str:
+        """Version synchrone du flux complet"""
+        state = RAGState(
+            question=question,
+            qualification=qualification,
+            qualification_text="\n".join(f"{k}: {v}" for k, v in qualification.items())
+        )
+
+        return run_sync(self._run_flow(state)).answer
+
+    async def _run_flow(self, state: RAGState) -> RAGState:
+        """Reformulation -> retrieval -> génération (les erreurs remontent)"""
+        state.started_at = time.perf_counter()
+        with record_trace(self.tru_app):
+            try:
+                state = await self.flow.run(state)
+            except Exception as e:
+                state.timings["total"] = (time.perf_counter() - state.started_at) * 1000
+                self._record_turn(state, error=e)
+                raise
+            # Temps réel : en mode spéculatif les étapes se chevauchent, leur somme surestime
+            state.timings["total"] = (time.perf_counter() - state.started_at) * 1000
+            self._record_turn(state)
+        return state
+
+    async def run_flow(self, question: str, qualification: dict) -> RAGState:
+        """Flux complet sans mode dégradé : l'état final (réponse, contextes, durées) ou une exception"""
+        state = RAGState(
+            question=question,
+            qualification=qualification,
+            qualification_text="\n".join(f"{k}: {v}" for k, v in qualification.items())
+        )
+        return await self._run_flow(state)
 
     async def full_chat_flow(self, question: str, qualification: dict) -> str:
         """Version asynchrone corrigée avec gestion d'erreur"""
@@ -99,9 +286,7 @@ class Orchestrator:
         )
 
         try:
-            state = await self.reformulation.run(state)
-            state = await self.retrieval.run(state)
-            state = await self.generation.run(state)
+            state = await self._run_flow(state)
             return state.answer
         except Exception as e:
             logger.error(f"Erreur dans le pipeline: {str(e)}", exc_info=True)
@@ -6,15 +6,7 @@ from core.steps.reformulation_step import ReformulationStep
 from core.steps.retrieval_step import RetrievalStep
 from core.steps.generation_step import GenerationStep
 from monitoring.feedback.definitions import create_feedback_definitions
-
-class Pipeline:
-    def __init__(self, steps):
-        self.steps = steps
-
-    async def run(self, state: RAGState) -> RAGState:
-        for step in self.steps:
-            state = await step.run(state)
-        return state
+from flow.pipeline import Pipeline  # runner DAG partagé
 
 class SalesPipeline:
     def __init__(self, questions: List[Tuple[str, str]], retriever, reform_gen, commercial_gen):
@@ -13,3 +13,5 @@ class RAGState:
     current_step: Optional[int] = None
     metadata: Dict[str, str] = field(default_factory=dict)
     conversation: List[Dict] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)  # durées par étape (ms)
+    started_at: Optional[float] = None  # début du tour (perf_counter), pour la durée totale réelle
@@ -1,9 +1,13 @@
 from core.state import RAGState
+from utils.event_loop import run_sync
 from trulens.apps.custom import instrument
-import asyncio
 
 
 class GenerationStep:
+    reads = {"question", "reformulated", "contexts"}
+    writes = {"answer"}
+    stage = "generation"
+
     @instrument
     def __init__(self, generator):
         self.generator = generator
@@ -20,9 +24,4 @@ class GenerationStep:
 
     def run_sync(self, state: RAGState) -> RAGState:
         """Version synchrone pour Streamlit"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(self.run(state))
-        finally:
-            loop.close()
+        return run_sync(self.run(state))
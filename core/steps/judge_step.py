@@ -2,6 +2,9 @@ from trulens.apps.custom import instrument
 
 
 class JudgeStep:
+    reads = {"answer"}
+    writes = {"judge_score"}
+    stage = "judge"
 
     def __init__(self, judge_llm):
         self.judge_llm = judge_llm
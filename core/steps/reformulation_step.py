@@ -1,6 +1,10 @@
 from core.state import RAGState
 
 class ReformulationStep:
+    reads = {"qualification_text"}
+    writes = {"reformulated"}
+    stage = "reformulation"
+
     def __init__(self, reform_gen):
         self.reform_gen = reform_gen
 
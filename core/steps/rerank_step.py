@@ -0,0 +1,16 @@
+from core.state import RAGState
+
+class RerankStep:
+    reads = {"question", "reformulated", "contexts"}
+    writes = {"contexts"}
+    stage = "rerank"
+
+    def __init__(self, reranker, k: int = 3):
+        self.reranker = reranker
+        self.k = k
+
+    async def run(self, state: RAGState) -> RAGState:
+        """Réordonne les candidats du retrieval et ne garde que les k meilleurs."""
+        query = state.question or state.reformulated or ""
+        state.contexts = await self.reranker.rerank(query, state.contexts, self.k)
+        return state
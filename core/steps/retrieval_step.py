@@ -1,11 +1,31 @@
 from core.state import RAGState
 
 class RetrievalStep:
-    def __init__(self, retriever):
+    reads = {"question", "reformulated", "qualification"}
+    writes = {"contexts"}
+    stage = "retrieval"
+    # En mode spéculatif, le retrieval démarre sur la question brute sans attendre la reformulation
+    speculative_reads = {"reformulated"}
+
+    # Champs de qualification ajoutés comme variantes de requête
+    qualification_fields = ("techno", "pain")
+
+    def __init__(self, retriever, k: int = 3):
         self.retriever = retriever
+        self.k = k
+
+    def queries(self, state: RAGState) -> list[str]:
+        """Variantes de requête : question brute, reformulation, champs clés de la qualification."""
+        candidates = [state.question, state.reformulated]
+        candidates += [state.qualification.get(field) for field in self.qualification_fields]
+        return list(dict.fromkeys(q for q in candidates if q and q.strip()))
 
     async def run(self, state: RAGState) -> RAGState:
         """Récupère les contextes et met à jour l'état."""
-        query = state.reformulated or state.question
-        state.contexts = await self.retriever.retrieve(query)
+        queries = self.queries(state)
+        if len(queries) > 1:
+            # Un seul embedding batché + une seule recherche pour toutes les variantes
+            state.contexts = await self.retriever.retrieve_many(queries, self.k)
+        else:
+            state.contexts = await self.retriever.retrieve(queries[0] if queries else "", self.k)
         return state
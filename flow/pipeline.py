@@ -1,9 +1,91 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger("pipeline")
+
+# Étape sans déclaration reads/writes : considérée comme lisant/écrivant tout l'état
+ALL = frozenset({"*"})
+
+
+def _fields(step, attr):
+    return frozenset(getattr(step, attr, ALL))
+
+
+def _conflict(a, b):
+    return bool(a & b) or "*" in a or "*" in b
+
+
 class Pipeline:
+    """Exécute des étapes selon leur graphe de dépendances sur l'état.
 
-    def __init__(self, steps):
+    Chaque étape déclare les champs de RAGState qu'elle lit (`reads`) et écrit
+    (`writes`). Une étape attend les étapes précédentes avec lesquelles elle est
+    en conflit ; les autres tournent en parallèle (asyncio.gather). Sans
+    déclaration, l'exécution reste séquentielle comme auparavant.
+
+    En mode spéculatif, les champs listés dans `speculative_reads` d'une étape
+    ne créent pas de dépendance (ex: retrieval lancé sur la question brute
+    pendant que la reformulation est en cours).
+
+    Les durées sont enregistrées dans `state.timings` sous le nom d'étape `stage`
+    ("reformulation", "retrieval"...), le même que sur le chemin de chat.
+    """
+
+    def __init__(self, steps, timeouts=None, default_timeout=None, speculative=False):
         self.steps = steps
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.speculative = speculative
+
+    def _reads(self, step):
+        reads = _fields(step, "reads")
+        if self.speculative:
+            reads = reads - frozenset(getattr(step, "speculative_reads", ()))
+        return reads
+
+    def dependencies(self):
+        """{indice d'étape: indices des étapes à attendre}"""
+        deps = {}
+        for i, step in enumerate(self.steps):
+            reads, writes = self._reads(step), _fields(step, "writes")
+            deps[i] = {
+                j for j, previous in enumerate(self.steps[:i])
+                if _conflict(reads, _fields(previous, "writes"))
+                or _conflict(writes, _fields(previous, "writes"))
+                or _conflict(writes, self._reads(previous))
+            }
+        return deps
+
+    def _timeout(self, step):
+        name = type(step).__name__
+        return self.timeouts.get(name, getattr(step, "timeout", self.default_timeout))
+
+    async def _run_step(self, step, state, waits):
+        if waits:
+            await asyncio.gather(*waits)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(step.run(state), timeout=self._timeout(step))
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout de l'étape {type(step).__name__}")
+            raise
+        timings = getattr(state, "timings", None)
+        if timings is not None:
+            timings[getattr(step, "stage", type(step).__name__)] = (time.perf_counter() - start) * 1000
 
     async def run(self, state):
-        for step in self.steps:
-            state = await step.run(state)
+        deps = self.dependencies()
+        tasks = []
+        for i, step in enumerate(self.steps):
+            waits = [tasks[j] for j in sorted(deps[i])]
+            tasks.append(asyncio.ensure_future(self._run_step(step, state, waits)))
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # Une étape échoue ou expire : on annule tout ce qui tourne encore
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
         return state
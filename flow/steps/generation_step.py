@@ -2,6 +2,9 @@ from trulens.apps.custom import instrument
 
 
 class GenerationStep:
+    reads = {"question", "reformulated", "contexts"}
+    writes = {"answer"}
+    stage = "generation"
 
     def __init__(self, generator):
         self.generator = generator
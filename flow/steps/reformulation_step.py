@@ -2,6 +2,9 @@ from trulens.apps.custom import instrument
 
 
 class ReformulationStep:
+    reads = {"question", "qualification_text"}
+    writes = {"reformulated"}
+    stage = "reformulation"
 
     def __init__(self, generator):
         self.generator = generator
@@ -3,6 +3,10 @@ from trulens.apps.custom import instrument
 
 
 class RetrievalStep:
+    reads = {"question", "reformulated"}
+    writes = {"contexts"}
+    stage = "retrieval"
+    speculative_reads = {"reformulated"}
 
     def __init__(self, retriever):
         self.retriever = retriever
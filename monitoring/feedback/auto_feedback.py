@@ -2,23 +2,61 @@ from trulens.core import Feedback
 from trulens.core.feedback.selector import Selector
 from trulens.otel.semconv.trace import SpanAttributes
 import numpy as np
+from typing import List
+from monitoring.feedback.embedding_scorers import get_scorer
+
+# Scores par similarité d'embeddings (modèle du pipeline, configuré au bootstrap).
+# Sans modèle configuré, on retombe sur des heuristiques lexicales.
+
+def _as_list(contexts) -> List[str]:
+    if contexts is None:
+        return []
+    if isinstance(contexts, str):
+        return [contexts]
+    return [c for c in contexts if isinstance(c, str)]
+
+def groundedness_scores(contexts: List[List[str]], outputs: List[str]) -> List[float]:
+    scorer = get_scorer()
+    if scorer is None:
+        return [_lexical_groundedness(c, o) for c, o in zip(contexts, outputs)]
+    return scorer.groundedness_batch(outputs, [_as_list(c) for c in contexts])
+
+def relevance_scores(questions: List[str], answers: List[str]) -> List[float]:
+    scorer = get_scorer()
+    if scorer is None:
+        return [_lexical_overlap(q, a) for q, a in zip(questions, answers)]
+    return scorer.answer_relevance_batch(questions, answers)
+
+def context_relevance_scores(questions: List[str], contexts: List[List[str]]) -> List[float]:
+    scorer = get_scorer()
+    if scorer is None:
+        return [_lexical_overlap(q, " ".join(_as_list(c))) for q, c in zip(questions, contexts)]
+    return scorer.context_relevance_batch(questions, [_as_list(c) for c in contexts])
+
+def _tokens(text: str) -> set:
+    return {w for w in (text or "").lower().split() if len(w) > 3}
+
+def _lexical_overlap(reference: str, text: str) -> float:
+    ref = _tokens(reference)
+    return len(ref & _tokens(text)) / len(ref) if ref else 0.0
+
+def _lexical_groundedness(contexts, output) -> float:
+    return _lexical_overlap(output, " ".join(_as_list(contexts)))
 
 def groundedness_score(contexts, output):
     if not contexts or not output:
         return 0.0
-    ctx = " ".join(contexts).lower()
-    out = output.lower()
-    return float(any(word in out for word in ctx.split()[:20]))
+    return groundedness_scores([_as_list(contexts)], [output])[0]
 
 def relevance_score(question, answer):
     if not question or not answer:
         return 0.0
-    return float(len(answer) > 10)
+    return relevance_scores([question], [answer])[0]
 
 def context_relevance_score(question, contexts):
-    if not contexts:
+    if not question or not contexts:
         return 0.0
-    return 1.0
+    return context_relevance_scores([question], [_as_list(contexts)])[0]
 
 f_groundedness = Feedback(
     groundedness_score,
@@ -0,0 +1,126 @@
+import logging
+import re
+from typing import Callable, Dict, List, Optional
+import numpy as np
+
+logger = logging.getLogger("embedding_scorers")
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?;])\s+|\n+")
+
+
+def split_sentences(text: str, min_chars: int = 12) -> List[str]:
+    """Découpe une réponse en phrases (les fragments trop courts sont ignorés)."""
+    sentences = [s.strip() for s in _SENTENCE_SPLIT.split(text or "") if s and s.strip()]
+    sentences = [s for s in sentences if len(s) >= min_chars]
+    return sentences or ([text.strip()] if text and text.strip() else [])
+
+
+class EmbeddingScorer:
+    """
+    Scores de groundedness / pertinence par similarité cosinus, sans appel LLM.
+
+    Les textes distincts d'un lot (phrases des réponses, chunks, questions) sont encodés
+    une seule fois par le sentence-transformer déjà chargé, puis le support de chaque phrase
+    est le max cosinus sur les chunks de son enregistrement, obtenu par un seul produit
+    matriciel masqué par enregistrement.
+    """
+
+    def __init__(self, encode: Callable[[List[str]], np.ndarray], max_pairs: int = 4_000_000):
+        # Pas d'appel à super().__init__()
+        self.name = "Embedding Scorer"
+        self.description = "Vectorized cosine-based groundedness and relevance"
+        self.encode = encode  # textes -> vecteurs normalisés (n, dim)
+        self.max_pairs = max_pairs  # borne mémoire du produit phrases x chunks (float32)
+
+    @classmethod
+    def from_embedder(cls, embedder, batch_size: int = 16) -> "EmbeddingScorer":
+        """Réutilise le modèle de HFEmbedding, par petits lots sur son thread d'encodage."""
+        return cls(lambda texts: embedder.encode_blocking(texts, batch_size=batch_size, normalize=True))
+
+    def _embed(self, texts: List[str]) -> Dict[str, np.ndarray]:
+        unique = list(dict.fromkeys(t for t in texts if t))
+        if not unique:
+            return {}
+        # encode() renvoie des vecteurs déjà normalisés : cosinus = produit scalaire
+        vectors = np.asarray(self.encode(unique), dtype=np.float32)
+        return dict(zip(unique, vectors))
+
+    # -------------------------
+    # Scores par lot
+    # -------------------------
+    def groundedness_batch(self, answers: List[str], contexts: List[List[str]]) -> List[float]:
+        """Moyenne, sur les phrases de chaque réponse, du max cosinus avec ses chunks."""
+        sentences = [split_sentences(a) for a in answers]
+        chunks = [[c for c in (ctx or []) if c] for ctx in contexts]
+        vectors = self._embed([s for ss in sentences for s in ss] + [c for cc in chunks for c in cc])
+        scores = [0.0] * len(answers)
+
+        # Découpage en sous-lots pour borner la taille de la matrice phrases x chunks
+        start = 0
+        while start < len(answers):
+            end = start
+            n_sent = n_chunk = 0
+            while end < len(answers):
+                n_sent_next = n_sent + len(sentences[end])
+                n_chunk_next = n_chunk + len(chunks[end])
+                if end > start and n_sent_next * n_chunk_next > self.max_pairs:
+                    break
+                n_sent, n_chunk = n_sent_next, n_chunk_next
+                end += 1
+            self._groundedness_block(sentences[start:end], chunks[start:end], vectors, scores, start)
+            start = end
+        return scores
+
+    def _groundedness_block(self, sentences, chunks, vectors, scores, offset):
+        sent_owner = np.array([i for i, ss in enumerate(sentences) for _ in ss], dtype=np.int64)
+        chunk_owner = np.array([i for i, cc in enumerate(chunks) for _ in cc], dtype=np.int64)
+        if not len(sent_owner) or not len(chunk_owner):
+            return
+        S = np.stack([vectors[s] for ss in sentences for s in ss])
+        C = np.stack([vectors[c] for cc in chunks for c in cc])
+        sims = S @ C.T
+        # Une phrase n'est comparée qu'aux chunks de son propre enregistrement
+        sims[sent_owner[:, None] != chunk_owner[None, :]] = -1.0
+        support = np.clip(sims.max(axis=1), 0.0, 1.0)
+        totals = np.bincount(sent_owner, weights=support, minlength=len(sentences))
+        counts = np.bincount(sent_owner, minlength=len(sentences))
+        has_chunks = np.bincount(chunk_owner, minlength=len(sentences)) > 0
+        for i in range(len(sentences)):
+            if counts[i] and has_chunks[i]:
+                scores[offset + i] = float(totals[i] / counts[i])
+
+    def answer_relevance_batch(self, questions: List[str], answers: List[str]) -> List[float]:
+        """Cosinus question / réponse, ramené à [0, 1]."""
+        vectors = self._embed(list(questions) + list(answers))
+        return [
+            float(np.clip(vectors[q] @ vectors[a], 0.0, 1.0)) if q in vectors and a in vectors else 0.0
+            for q, a in zip(questions, answers)
+        ]
+
+    def context_relevance_batch(self, questions: List[str], contexts: List[List[str]]) -> List[float]:
+        """Cosinus moyen question / chunks récupérés, ramené à [0, 1]."""
+        vectors = self._embed(list(questions) + [c for ctx in contexts for c in (ctx or [])])
+        scores = []
+        for q, ctx in zip(questions, contexts):
+            ctx = [c for c in (ctx or []) if c in vectors]
+            if q not in vectors or not ctx:
+                scores.append(0.0)
+                continue
+            sims = np.stack([vectors[c] for c in ctx]) @ vectors[q]
+            scores.append(float(np.clip(sims, 0.0, 1.0).mean()))
+        return scores
+
+
+_scorer: Optional[EmbeddingScorer] = None
+
+
+def configure(embedder) -> EmbeddingScorer:
+    """Branche les feedbacks sur le modèle d'embedding du pipeline (appelé au bootstrap)."""
+    global _scorer
+    _scorer = EmbeddingScorer.from_embedder(embedder)
+    logger.info(f"📐 Scores d'évaluation par embeddings ({getattr(embedder, 'model_name', '?')})")
+    return _scorer
+
+
+def get_scorer() -> Optional[EmbeddingScorer]:
+    return _scorer
@@ -0,0 +1,214 @@
+import logging
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+from monitoring.feedback.auto_feedback import groundedness_scores, relevance_scores, context_relevance_scores
+
+logger = logging.getLogger("evaluation_worker")
+
+# Évaluations par lot : chaque fonction reçoit une liste d'enregistrements et renvoie un score par enregistrement
+BatchScorer = Callable[[List[Dict]], List[float]]
+
+DEFAULT_SCORERS: Dict[str, BatchScorer] = {
+    "Groundedness": lambda records: groundedness_scores(
+        [r["contexts"] for r in records], [r["answer"] for r in records]
+    ),
+    "Answer Relevance": lambda records: relevance_scores(
+        [r["question"] for r in records], [r["answer"] for r in records]
+    ),
+    "Context Relevance": lambda records: context_relevance_scores(
+        [r["question"] for r in records], [r["contexts"] for r in records]
+    ),
+}
+
+_STOP = object()
+
+
+class EvaluationWorker:
+    """
+    Évaluation des réponses hors du chemin de requête.
+
+    submit() ne bloque jamais : au-delà de high_watermark la file n'accepte plus qu'un
+    échantillon des enregistrements, et quand elle est pleine ils sont abandonnés.
+    Un thread dédié vide la file par lots, calcule les feedbacks et écrit les
+    scores en une seule transaction SQLite par lot.
+    """
+
+    def __init__(
+        self,
+        db_path: str | None = None,
+        scorers: Dict[str, BatchScorer] | None = None,
+        queue_size: int = 1000,
+        batch_size: int = 32,
+        flush_interval: float = 2.0,
+        high_watermark: float = 0.75
+    ):
+        # Pas d'appel à super().__init__()
+        self.name = "Evaluation Worker"
+        self.description = "Background batched feedback evaluation"
+        self.db_path = db_path or "data/evaluations.sqlite3"
+        self.scorers = scorers or dict(DEFAULT_SCORERS)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.high_watermark = high_watermark
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.submitted = 0
+        self.sampled_out = 0
+        self.dropped = 0
+        self.evaluated = 0
+        self.failed = 0
+
+    # -------------------------
+    # Côté requête (non bloquant)
+    # -------------------------
+    def submit(
+        self,
+        question: str,
+        answer: str,
+        contexts: List[str],
+        latency_ms: float | None = None,
+        error: str | None = None,
+        record_id: str | None = None,
+        force: bool = False
+    ) -> bool:
+        """Met un enregistrement en file ; renvoie False s'il est échantillonné ou abandonné.
+
+        force=True (requête lente ou en erreur) contourne l'échantillonnage de contre-pression.
+        """
+        self._ensure_started()
+        fill = self._queue.qsize() / self._queue.maxsize
+        if fill >= self.high_watermark and not force:
+            # Contre-pression : probabilité d'acceptation décroissante jusqu'à la saturation
+            keep = (1.0 - fill) / (1.0 - self.high_watermark)
+            if random.random() >= keep:
+                self.sampled_out += 1
+                return False
+        record = {
+            "record_id": record_id or uuid.uuid4().hex,
+            "ts": time.time(),
+            "question": question or "",
+            "answer": answer or "",
+            "contexts": list(contexts or []),
+            "latency_ms": latency_ms,
+            "error": error,
+        }
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.submitted += 1
+        return True
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="evaluation-worker", daemon=True)
+                self._thread.start()
+                logger.info("🧪 Worker d'évaluation démarré")
+
+    # -------------------------
+    # Thread d'évaluation
+    # -------------------------
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS evaluations (
+                record_id TEXT NOT NULL,
+                ts REAL NOT NULL,
+                feedback TEXT NOT NULL,
+                score REAL,
+                latency_ms REAL,
+                error TEXT,
+                PRIMARY KEY (record_id, feedback)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_evaluations_ts ON evaluations(ts)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_evaluations_feedback_score ON evaluations(feedback, score)")
+        conn.commit()
+        return conn
+
+    def _next_batch(self) -> tuple[List[Dict], bool]:
+        batch: List[Dict] = []
+        try:
+            item = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return batch, False
+        if item is _STOP:
+            return batch, True
+        batch.append(item)
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _evaluate(self, batch: List[Dict]) -> List[tuple]:
+        rows = []
+        for name, scorer in self.scorers.items():
+            try:
+                scores = scorer(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                logger.warning(f"⚠️ Feedback '{name}' en échec sur un lot de {len(batch)}: {e}")
+                continue
+            rows.extend(
+                (r["record_id"], r["ts"], name, float(score), r["latency_ms"], r["error"])
+                for r, score in zip(batch, scores)
+            )
+        return rows
+
+    def _run(self):
+        conn = self._connect()
+        stopping = False
+        while not stopping:
+            batch, stopping = self._next_batch()
+            if not batch:
+                continue
+            rows = self._evaluate(batch)
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO evaluations (record_id, ts, feedback, score, latency_ms, error) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        rows
+                    )
+                self.evaluated += len(batch)
+            except sqlite3.Error as e:
+                self.failed += len(batch)
+                logger.error(f"❌ Écriture des évaluations impossible: {e}")
+        conn.close()
+        logger.info("🧪 Worker d'évaluation arrêté")
+
+    def stop(self, timeout: float | None = 10.0):
+        """Vide la file puis arrête le thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP, timeout=timeout)
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "submitted": self.submitted,
+            "sampled_out": self.sampled_out,
+            "dropped": self.dropped,
+            "evaluated": self.evaluated,
+            "failed": self.failed,
+            "queued": self._queue.qsize(),
+        }
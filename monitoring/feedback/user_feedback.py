@@ -1,7 +1,7 @@
 import streamlit as st
 from typing import Dict, Optional
 
-def capture_user_feedback(question: str, answer: str) -> Optional[Dict]:
+def capture_user_feedback(question: str, answer: str, session_id: Optional[str] = None) -> Optional[Dict]:
     with st.expander("⭐ Votre avis sur cette réponse"):
         score = st.slider("Pertinence", 1, 5, 3)
         comment = st.text_area("Commentaire")
@@ -12,5 +12,6 @@ def capture_user_feedback(question: str, answer: str) -> Optional[Dict]:
                 "answer": answer,
                 "score": score,
                 "comment": comment,
+                "session_id": session_id,
             }
     return None
@@ -0,0 +1,260 @@
+"""Métriques légères (latences par étape, tokens, caches, erreurs) au format Prometheus.
+
+Indépendant de TruLens. Désactivé par défaut : chaque point d'instrumentation se
+réduit alors à un test de booléen (bien en dessous de la microseconde).
+
+    from monitoring import metrics
+    metrics.enable()
+    with metrics.timer("embed"):
+        ...
+    metrics.inc("smartcv_errors_total", component="retriever")
+    print(metrics.render())
+"""
+import bisect
+import logging
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("metrics")
+
+# Bornes des histogrammes de latence (ms)
+BUCKETS_MS: Tuple[float, ...] = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+STAGE_HISTOGRAM = "smartcv_stage_duration_ms"
+
+_enabled = False
+_lock = threading.Lock()
+_histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], List[float]] = {}
+_counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+_caches: Dict[str, Callable[[], Dict[str, int]]] = {}
+_HELP = {
+    STAGE_HISTOGRAM: "Durée par étape du pipeline (ms)",
+    "smartcv_tokens_total": "Tokens envoyés (in) et reçus (out) du LLM",
+    "smartcv_errors_total": "Erreurs par composant",
+    "smartcv_cache_requests_total": "Accès aux caches par résultat (hit / miss)",
+}
+
+
+def enable(flag: bool = True):
+    global _enabled
+    _enabled = bool(flag)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def _key(name: str, labels: Dict[str, str]) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+# -------------------------
+# Enregistrement
+# -------------------------
+def observe(name: str, value_ms: float, **labels):
+    """Ajoute une mesure (ms) à un histogramme."""
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    index = bisect.bisect_left(BUCKETS_MS, value_ms)
+    with _lock:
+        series = _histograms.get(key)
+        if series is None:
+            # [compte par bucket..., +Inf, somme]
+            series = _histograms[key] = [0.0] * (len(BUCKETS_MS) + 2)
+        series[index] += 1
+        series[-1] += value_ms
+
+
+def observe_stage(stage: str, value_ms: float):
+    observe(STAGE_HISTOGRAM, value_ms, stage=stage)
+
+
+def observe_timings(timings: Dict[str, float]):
+    """Reporte les durées d'un RAGState.timings (une série par étape)."""
+    if not _enabled:
+        return
+    for stage, value in timings.items():
+        observe(STAGE_HISTOGRAM, value, stage=stage)
+
+
+def inc(name: str, amount: float = 1.0, **labels):
+    if not _enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0.0) + amount
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(STAGE_HISTOGRAM, (time.perf_counter() - self.start) * 1000, stage=self.stage)
+        # Abandon d'un flux ou annulation (BaseException) : pas une erreur
+        if exc_type is not None and issubclass(exc_type, Exception):
+            inc("smartcv_errors_total", component=self.stage)
+        return False
+
+
+def timer(stage: str):
+    """Chronomètre un bloc dans smartcv_stage_duration_ms{stage=...} (erreurs comptées)."""
+    return _Timer(stage) if _enabled else _NULL_TIMER
+
+
+def record_tokens(tokens_in: Optional[int], tokens_out: Optional[int], model: str = ""):
+    if not _enabled:
+        return
+    if tokens_in:
+        inc("smartcv_tokens_total", tokens_in, direction="in", model=model)
+    if tokens_out:
+        inc("smartcv_tokens_total", tokens_out, direction="out", model=model)
+
+
+def register_cache(name: str, stats: Callable[[], Dict[str, int]]):
+    """Expose les compteurs hits/misses d'un cache (lus au moment du scrape)."""
+    _caches[name] = stats
+
+
+# -------------------------
+# Export
+# -------------------------
+def _labels(pairs: Iterable[Tuple[str, str]], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    items = [*pairs, *extra]
+    if not items:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render() -> str:
+    """Texte d'exposition Prometheus (version 0.0.4)."""
+    with _lock:
+        histograms = {k: list(v) for k, v in _histograms.items()}
+        counters = dict(_counters)
+    for cache, stats in list(_caches.items()):
+        try:
+            values = stats()
+        except Exception:
+            continue
+        for field, result in (("hits", "hit"), ("misses", "miss")):
+            if field in values:
+                counters[_key("smartcv_cache_requests_total", {"cache": cache, "result": result})] = values[field]
+
+    lines: List[str] = []
+    for name in sorted({k[0] for k in histograms}):
+        lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} histogram")
+        for (series_name, labels), series in sorted(histograms.items()):
+            if series_name != name:
+                continue
+            cumulative = 0.0
+            for bound, count in zip((*BUCKETS_MS, "+Inf"), series[:-1]):
+                cumulative += count
+                le = bound if bound == "+Inf" else _format(bound)
+                lines.append(f"{name}_bucket{_labels(labels, (('le', le),))} {_format(cumulative)}")
+            lines.append(f"{name}_sum{_labels(labels)} {_format(series[-1])}")
+            lines.append(f"{name}_count{_labels(labels)} {_format(cumulative)}")
+    for name in sorted({k[0] for k in counters}):
+        lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} counter")
+        for (series_name, labels), value in sorted(counters.items()):
+            if series_name == name:
+                lines.append(f"{name}{_labels(labels)} {_format(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path: str):
+    """Écriture atomique pour le textfile collector de node_exporter."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".prom.tmp")
+    with os.fdopen(fd, "w") as f:
+        f.write(render())
+    os.replace(tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_textfile_thread: Optional[threading.Thread] = None
+_exporter_lock = threading.Lock()
+
+
+def start_http_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serveur /metrics local (une seule instance par process)."""
+    global _server
+    with _exporter_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+            logger.info(f"📈 Métriques exposées sur http://{host}:{port}/metrics")
+    return _server
+
+
+def start_textfile_writer(path: str, interval: float = 15.0) -> threading.Thread:
+    """Réécrit périodiquement le fichier de métriques (un seul writer par process)."""
+    global _textfile_thread
+
+    def loop():
+        while True:
+            try:
+                write_textfile(path)
+            except OSError as e:
+                logger.warning(f"Écriture des métriques impossible ({path}): {e}")
+            time.sleep(interval)
+
+    with _exporter_lock:
+        if _textfile_thread is None:
+            _textfile_thread = threading.Thread(target=loop, name="metrics-textfile", daemon=True)
+            _textfile_thread.start()
+            logger.info(f"📈 Métriques écrites dans {path} toutes les {interval:.0f} s")
+    return _textfile_thread
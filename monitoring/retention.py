@@ -0,0 +1,182 @@
+"""Rétention et compaction des données de monitoring.
+
+Usage:
+    python -m monitoring.retention --db default.sqlite --days 7 --vacuum
+
+Supprime les traces TruLens (trulens_records / trulens_feedbacks / trulens_events)
+et les évaluations plus anciennes que `days`, sauf la « queue » utile : traces
+lentes, en erreur ou mal notées, conservées jusqu'à `tail_days`. Les suppressions
+se font par paquets pour ne jamais bloquer longtemps les écrivains.
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+from typing import Dict
+
+logger = logging.getLogger("retention")
+
+_DAY = 86400.0
+
+
+def _tables(conn: sqlite3.Connection) -> set:
+    return {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def _delete_in_chunks(conn: sqlite3.Connection, table: str, where: str, params: Dict, chunk: int) -> int:
+    deleted = 0
+    while True:
+        with conn:
+            cursor = conn.execute(
+                f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} WHERE {where} LIMIT :chunk)",
+                {**params, "chunk": chunk}
+            )
+        deleted += cursor.rowcount
+        if cursor.rowcount < chunk:
+            return deleted
+
+
+def compact_trulens(
+    db_path: str = "default.sqlite",
+    days: float = 7,
+    tail_days: float = 30,
+    slow_ms: float = 5000,
+    low_score: float = 0.5,
+    chunk: int = 2000,
+    vacuum: bool = False
+) -> Dict[str, int]:
+    """Élague la base TruLens en conservant les traces lentes, en erreur ou mal notées."""
+    if not os.path.exists(db_path):
+        return {}
+    now = time.time()
+    params = {
+        "cutoff": now - days * _DAY,
+        "tail_cutoff": now - tail_days * _DAY,
+        # trulens_events stocke des TIMESTAMP texte (UTC)
+        "cutoff_iso": datetime.fromtimestamp(now - days * _DAY, timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        "tail_cutoff_iso": datetime.fromtimestamp(now - tail_days * _DAY, timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        "slow_ms": slow_ms,
+        "low_score": low_score,
+    }
+    conn = sqlite3.connect(db_path, timeout=60)
+    conn.execute("PRAGMA journal_mode=WAL")
+    tables = _tables(conn)
+    stats: Dict[str, int] = {}
+
+    # Enregistrements à garder dans la fenêtre de queue : feedback bas ou en échec
+    conn.execute("CREATE TEMP TABLE keep_records (record_id TEXT PRIMARY KEY)")
+    if "trulens_feedbacks" in tables:
+        conn.execute("""
+            INSERT OR IGNORE INTO keep_records
+            SELECT record_id FROM trulens_feedbacks
+            WHERE result < :low_score OR status = 'failed' OR error IS NOT NULL
+        """, params)
+
+    if "trulens_records" in tables:
+        # Durée depuis perf_json (start_time / end_time ISO)
+        stats["trulens_records"] = _delete_in_chunks(conn, "trulens_records", """
+            (ts < :tail_cutoff OR (
+                ts < :cutoff
+                AND record_id NOT IN (SELECT record_id FROM keep_records)
+                AND COALESCE((julianday(json_extract(perf_json, '$.end_time'))
+                    - julianday(json_extract(perf_json, '$.start_time'))) * 86400000.0, 0) < :slow_ms
+            ))
+        """, params, chunk)
+
+    if "trulens_events" in tables:
+        # Traces OTEL : on garde toutes les spans d'une trace dont une span est lente ou en erreur
+        conn.execute("CREATE TEMP TABLE keep_traces (trace_id TEXT PRIMARY KEY)")
+        conn.execute("""
+            INSERT OR IGNORE INTO keep_traces
+            SELECT json_extract(trace, '$.trace_id') FROM trulens_events
+            WHERE timestamp < :cutoff_iso AND timestamp >= :tail_cutoff_iso AND (
+                json_extract(record, '$.status') = 'STATUS_CODE_ERROR'
+                OR (julianday(timestamp) - julianday(start_timestamp)) * 86400000.0 >= :slow_ms
+                OR json_extract(record_attributes, '$."ai.observability.record_id"')
+                    IN (SELECT record_id FROM keep_records)
+            )
+        """, params)
+        stats["trulens_events"] = _delete_in_chunks(conn, "trulens_events", """
+            timestamp < :tail_cutoff_iso OR (
+                timestamp < :cutoff_iso
+                AND json_extract(trace, '$.trace_id') NOT IN (SELECT trace_id FROM keep_traces)
+            )
+        """, params, chunk)
+
+    if "trulens_feedbacks" in tables:
+        # Les feedbacks suivent la même fenêtre ; ceux des traces mal notées restent en queue
+        stats["trulens_feedbacks"] = _delete_in_chunks(conn, "trulens_feedbacks", """
+            last_ts < :tail_cutoff OR (last_ts < :cutoff AND record_id NOT IN (SELECT record_id FROM keep_records))
+        """, params, chunk)
+
+    _finish(conn, vacuum)
+    logger.info(f"🧹 Compaction {db_path} : {stats}")
+    return stats
+
+
+def compact_evaluations(
+    db_path: str = "data/evaluations.sqlite3",
+    days: float = 7,
+    tail_days: float = 30,
+    slow_ms: float = 5000,
+    low_score: float = 0.5,
+    chunk: int = 2000,
+    vacuum: bool = False
+) -> Dict[str, int]:
+    """Même politique pour les scores du worker d'évaluation et les enregistrements de queue."""
+    if not os.path.exists(db_path):
+        return {}
+    now = time.time()
+    params = {"cutoff": now - days * _DAY, "tail_cutoff": now - tail_days * _DAY,
+              "slow_ms": slow_ms, "low_score": low_score}
+    conn = sqlite3.connect(db_path, timeout=60)
+    conn.execute("PRAGMA journal_mode=WAL")
+    tables = _tables(conn)
+    stats: Dict[str, int] = {}
+    if "evaluations" in tables:
+        conn.execute("""
+            CREATE TEMP TABLE keep_records AS
+            SELECT DISTINCT record_id FROM evaluations
+            WHERE ts < :cutoff AND (error IS NOT NULL OR latency_ms >= :slow_ms OR score < :low_score)
+        """, params)
+        stats["evaluations"] = _delete_in_chunks(conn, "evaluations", """
+            ts < :tail_cutoff OR (ts < :cutoff AND record_id NOT IN (SELECT record_id FROM keep_records))
+        """, params, chunk)
+    if "trace_tail" in tables:
+        # Enregistrements légers des requêtes lentes / en erreur : conservés toute la fenêtre de queue
+        stats["trace_tail"] = _delete_in_chunks(conn, "trace_tail", "ts < :tail_cutoff", params, chunk)
+    _finish(conn, vacuum)
+    logger.info(f"🧹 Compaction {db_path} : {stats}")
+    return stats
+
+
+def _finish(conn: sqlite3.Connection, vacuum: bool):
+    # Rend au disque l'espace du WAL, puis (optionnellement) celui des pages libérées
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    if vacuum:
+        conn.execute("VACUUM")
+    conn.close()
+
+
+if __name__ == "__main__":
+    from config.settings import RAG_CONFIG
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Rétention / compaction des données de monitoring")
+    parser.add_argument("--db", default="default.sqlite", help="Base TruLens")
+    parser.add_argument("--evaluations", default=RAG_CONFIG["evaluation_db_path"], help="Base du worker d'évaluation")
+    parser.add_argument("--days", type=float, default=RAG_CONFIG["trace_retention_days"])
+    parser.add_argument("--tail-days", type=float, default=RAG_CONFIG["trace_tail_retention_days"])
+    parser.add_argument("--slow-ms", type=float, default=RAG_CONFIG["trace_slow_ms"])
+    parser.add_argument("--low-score", type=float, default=RAG_CONFIG["trace_low_score"])
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM après suppression (verrou exclusif)")
+    args = parser.parse_args()
+
+    policy = dict(days=args.days, tail_days=args.tail_days, slow_ms=args.slow_ms,
+                  low_score=args.low_score, vacuum=args.vacuum)
+    compact_trulens(args.db, **policy)
+    compact_evaluations(args.evaluations, **policy)
+    if RAG_CONFIG["trace_tail_db_path"] != args.evaluations:
+        compact_evaluations(RAG_CONFIG["trace_tail_db_path"], **policy)
@@ -0,0 +1,127 @@
+import contextvars
+import logging
+import random
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger("sampling")
+
+# Décision d'échantillonnage de la trace en cours (propagée aux étapes et tâches asyncio filles)
+_sampled: contextvars.ContextVar[Optional[bool]] = contextvars.ContextVar("trace_sampled", default=None)
+
+
+class TraceSampler:
+    """
+    Échantillonnage des traces TruLens.
+
+    - En tête : une requête sur `rate` est enregistrée avec son arbre de spans complet,
+      la décision est prise à la racine et héritée par toutes les étapes.
+    - En queue : une requête lente ou en erreur est toujours conservée sous forme
+      d'enregistrement léger (TraceTailStore), que le worker d'évaluation soit actif ou non.
+      Les requêtes mal notées, connues seulement après évaluation, sont gardées par la
+      compaction (monitoring.retention).
+    """
+
+    def __init__(self, rate: float = 0.05, slow_ms: float = 5000.0, tail_store=None):
+        # Pas d'appel à super().__init__()
+        self.name = "Trace Sampler"
+        self.description = "Head sampling plus tail retention of slow or errored traces"
+        self.rate = max(0.0, min(1.0, rate))
+        self.slow_ms = slow_ms
+        self.tail_store = tail_store
+        self.sampled = 0
+        self.skipped = 0
+        self.retained = 0
+
+    @contextmanager
+    def trace(self) -> Iterator[bool]:
+        """Ouvre une trace ; les appels imbriqués réutilisent la décision de la racine."""
+        decision = _sampled.get()
+        if decision is not None:
+            yield decision
+            return
+        decision = random.random() < self.rate
+        if decision:
+            self.sampled += 1
+        else:
+            self.skipped += 1
+        token = _sampled.set(decision)
+        try:
+            yield decision
+        finally:
+            try:
+                _sampled.reset(token)
+            except ValueError:
+                # Flux async fermé depuis un autre contexte (client déconnecté, aclose par le GC)
+                pass
+
+    def keep_tail(self, latency_ms: float | None = None, error: str | None = None) -> bool:
+        """Une requête lente ou en erreur est toujours conservée, échantillonnée ou non."""
+        return error is not None or (latency_ms is not None and latency_ms >= self.slow_ms)
+
+    def retain(
+        self,
+        record_id: str,
+        latency_ms: float | None = None,
+        error: str | None = None,
+        question: str | None = None,
+        timings: Dict[str, float] | None = None
+    ) -> bool:
+        """Écrit l'enregistrement léger d'une requête lente ou en erreur ; True si elle est conservée."""
+        if not self.keep_tail(latency_ms, error):
+            return False
+        self.retained += 1
+        if self.tail_store is not None:
+            self.tail_store.add(
+                record_id, sampled=bool(_sampled.get()), latency_ms=latency_ms,
+                error=error, question=question, timings=timings
+            )
+        return True
+
+    def stats(self):
+        return {"rate": self.rate, "sampled": self.sampled, "skipped": self.skipped, "retained": self.retained}
+
+
+@contextmanager
+def record_trace(tru_app=None, sampler: Optional[TraceSampler] = None) -> Iterator[bool]:
+    """Racine de trace : tire la décision une fois et n'enregistre dans TruLens que les traces retenues.
+
+    Hors enregistrement, les méthodes @instrument s'exécutent sans créer de spans.
+    Un contexte d'enregistrement par requête (et non `with tru_app:`) permet des
+    requêtes concurrentes.
+    """
+    if _sampled.get() is not None:
+        # Appel imbriqué : la racine a déjà décidé et ouvert l'enregistrement
+        yield _sampled.get()
+        return
+    with (sampler or get_sampler()).trace() as decision:
+        if not decision or tru_app is None:
+            yield decision
+            return
+        from trulens.core.otel.instrument import OtelRecordingContext
+        with OtelRecordingContext(
+            tru_app=tru_app,
+            app_name=tru_app.app_name,
+            app_version=tru_app.app_version,
+            run_name="",
+            input_id=""
+        ):
+            yield decision
+
+
+_sampler: Optional[TraceSampler] = None
+
+
+def configure(rate: float, slow_ms: float, tail_db_path: str | None = None) -> TraceSampler:
+    global _sampler
+    from monitoring.storage.trace_tail_store import TraceTailStore
+    _sampler = TraceSampler(rate=rate, slow_ms=slow_ms, tail_store=TraceTailStore(tail_db_path))
+    logger.info(f"🎯 Échantillonnage des traces : {_sampler.rate:.0%} (lentes >= {slow_ms:.0f} ms toujours conservées)")
+    return _sampler
+
+
+def get_sampler() -> TraceSampler:
+    global _sampler
+    if _sampler is None:
+        _sampler = TraceSampler()
+    return _sampler
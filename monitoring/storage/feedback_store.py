@@ -1,25 +1,204 @@
 import json
+import logging
 import os
-from typing import List, Dict
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
 from pathlib import Path
 
-FEEDBACK_FILE = Path("data/feedbacks.json")
+logger = logging.getLogger("feedback_store")
+
+FEEDBACK_FILE = Path("data/feedbacks.json")  # ancien format (migré au premier accès)
+FEEDBACK_DB = Path("data/feedbacks.sqlite3")
+
+_COLUMNS = ("question", "answer", "score", "comment", "session_id", "ts")
+
 
 class FeedbackStore:
+    """Feedbacks utilisateurs dans une table SQLite (WAL).
+
+    Ajout en O(1), écrivains concurrents (sessions, process) sérialisés par SQLite,
+    recherches indexées par score, date et session, itération en flux pour les exports.
+    """
+
+    _lock = threading.Lock()
+    _conn: Optional[sqlite3.Connection] = None
+
     @staticmethod
-    def save_feedback(feedback: Dict):
-        feedbacks = FeedbackStore._load_feedbacks()
-        feedbacks.append(feedback)
-        FEEDBACK_FILE.parent.mkdir(exist_ok=True, parents=True)
-        FEEDBACK_FILE.write_text(json.dumps(feedbacks, indent=2))
+    def _connect() -> sqlite3.Connection:
+        if FeedbackStore._conn is None:
+            FEEDBACK_DB.parent.mkdir(exist_ok=True, parents=True)
+            conn = sqlite3.connect(FEEDBACK_DB, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS feedbacks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    ts REAL NOT NULL,
+                    session_id TEXT,
+                    score INTEGER,
+                    question TEXT,
+                    answer TEXT,
+                    comment TEXT,
+                    extra TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_feedbacks_score ON feedbacks(score)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_feedbacks_ts ON feedbacks(ts)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_feedbacks_session ON feedbacks(session_id, ts)")
+            conn.commit()
+            FeedbackStore._conn = conn
+            FeedbackStore._migrate_json(conn)
+        return FeedbackStore._conn
 
     @staticmethod
-    def _load_feedbacks() -> List[Dict]:
+    def _migrate_json(conn: sqlite3.Connection):
+        """Importe une seule fois l'ancien data/feedbacks.json puis le renomme."""
         if not FEEDBACK_FILE.exists():
-            return []
-        return json.loads(FEEDBACK_FILE.read_text())
+            return
+        try:
+            legacy = json.loads(FEEDBACK_FILE.read_text() or "[]")
+        except json.JSONDecodeError as e:
+            logger.error(f"❌ Migration des feedbacks impossible ({FEEDBACK_FILE}): {e}")
+            return
+        mtime = FEEDBACK_FILE.stat().st_mtime
+        # Verrou d'écriture : un seul process effectue la migration.
+        # user_version (transactionnel) marque l'import, le fichier n'est renommé qu'après commit.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= 1:
+                conn.rollback()
+            else:
+                conn.executemany(
+                    "INSERT INTO feedbacks (ts, session_id, score, question, answer, comment, extra) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [FeedbackStore._to_row({"ts": mtime, **f}) for f in legacy]
+                )
+                conn.execute("PRAGMA user_version = 1")
+                conn.commit()
+                logger.info(f"📦 {len(legacy)} feedbacks migrés de {FEEDBACK_FILE} vers {FEEDBACK_DB}")
+        except Exception:
+            conn.rollback()
+            raise
+        # Déjà importé (ici ou par un autre process) : le JSON n'est plus relu
+        try:
+            os.replace(FEEDBACK_FILE, FEEDBACK_FILE.with_suffix(".json.migrated"))
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _to_row(feedback: Dict) -> tuple:
+        extra = {k: v for k, v in feedback.items() if k not in _COLUMNS}
+        return (
+            feedback.get("ts") or time.time(),
+            feedback.get("session_id"),
+            feedback.get("score"),
+            feedback.get("question"),
+            feedback.get("answer"),
+            feedback.get("comment"),
+            json.dumps(extra, ensure_ascii=False) if extra else None,
+        )
+
+    @staticmethod
+    def _from_row(row: tuple) -> Dict:
+        ts, session_id, score, question, answer, comment, extra = row
+        feedback = {
+            "question": question,
+            "answer": answer,
+            "score": score,
+            "comment": comment,
+            "session_id": session_id,
+            "ts": ts,
+        }
+        if extra:
+            feedback.update(json.loads(extra))
+        return feedback
+
+    @staticmethod
+    def save_feedback(feedback: Dict):
+        row = FeedbackStore._to_row(feedback)
+        with FeedbackStore._lock:
+            conn = FeedbackStore._connect()
+            with conn:
+                conn.execute(
+                    "INSERT INTO feedbacks (ts, session_id, score, question, answer, comment, extra) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    row
+                )
+
+    @staticmethod
+    def _query(
+        score: Optional[int] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        session_id: Optional[str] = None,
+        limit: Optional[int] = None
+    ):
+        clauses, params = [], []
+        if score is not None:
+            clauses.append("score = ?")
+            params.append(score)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        if session_id is not None:
+            clauses.append("session_id = ?")
+            params.append(session_id)
+        sql = "SELECT ts, session_id, score, question, answer, comment, extra FROM feedbacks"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY ts"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return sql, params
+
+    @staticmethod
+    def get_feedbacks(
+        score: Optional[int] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        session_id: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        return list(FeedbackStore.iter_feedbacks(score, since, until, session_id, limit))
+
+    @staticmethod
+    def iter_feedbacks(
+        score: Optional[int] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        session_id: Optional[str] = None,
+        limit: Optional[int] = None,
+        batch_size: int = 500
+    ) -> Iterator[Dict]:
+        """Itère en flux (par paquets) sans charger toute la table : exports, analyses."""
+        sql, params = FeedbackStore._query(score, since, until, session_id, limit)
+        with FeedbackStore._lock:
+            FeedbackStore._connect()
+        # Connexion de lecture dédiée : l'export ne bloque pas les écritures (WAL)
+        conn = sqlite3.connect(FEEDBACK_DB, timeout=30)
+        try:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield FeedbackStore._from_row(row)
+        finally:
+            conn.close()
 
     @staticmethod
-    def get_feedbacks(score: Optional[int] = None) -> List[Dict]:
-        feedbacks = FeedbackStore._load_feedbacks()
-        return [f for f in feedbacks if score is None or f["score"] == score]
+    def count(score: Optional[int] = None) -> int:
+        with FeedbackStore._lock:
+            conn = FeedbackStore._connect()
+            if score is None:
+                (total,) = conn.execute("SELECT COUNT(*) FROM feedbacks").fetchone()
+            else:
+                (total,) = conn.execute("SELECT COUNT(*) FROM feedbacks WHERE score = ?", (score,)).fetchone()
+        return total
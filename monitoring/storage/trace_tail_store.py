@@ -0,0 +1,89 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("trace_tail_store")
+
+
+class TraceTailStore:
+    """Enregistrements légers des requêtes lentes ou en erreur (rétention en queue).
+
+    Indépendant de TruLens et du worker d'évaluation : une requête non échantillonnée
+    mais lente ou en échec laisse toujours une ligne (durées par étape, erreur).
+    """
+
+    def __init__(self, db_path: str | None = None):
+        # Pas d'appel à super().__init__()
+        self.name = "Trace Tail Store"
+        self.description = "Lightweight records of slow or errored requests"
+        self.db_path = db_path or "data/evaluations.sqlite3"
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS trace_tail (
+                    record_id TEXT PRIMARY KEY,
+                    ts REAL NOT NULL,
+                    sampled INTEGER NOT NULL,
+                    latency_ms REAL,
+                    error TEXT,
+                    question TEXT,
+                    timings TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_trace_tail_ts ON trace_tail(ts)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def add(
+        self,
+        record_id: str,
+        sampled: bool,
+        latency_ms: float | None = None,
+        error: str | None = None,
+        question: str | None = None,
+        timings: Dict[str, float] | None = None
+    ):
+        row = (
+            record_id, time.time(), int(sampled), latency_ms, error,
+            question, json.dumps(timings) if timings else None
+        )
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO trace_tail (record_id, ts, sampled, latency_ms, error, question, timings) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    row
+                )
+
+    def recent(self, limit: int = 100) -> List[Dict]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT record_id, ts, sampled, latency_ms, error, question, timings "
+                "FROM trace_tail ORDER BY ts DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [
+            {
+                "record_id": record_id,
+                "ts": ts,
+                "sampled": bool(sampled),
+                "latency_ms": latency_ms,
+                "error": error,
+                "question": question,
+                "timings": json.loads(timings) if timings else {},
+            }
+            for record_id, ts, sampled, latency_ms, error, question, timings in rows
+        ]
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import queue
+import threading
+from typing import AsyncIterator, Awaitable, Iterator, Optional, TypeVar
+
+logger = logging.getLogger("event_loop")
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+_SENTINEL = object()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Boucle d'événements unique du process, exécutée dans un thread daemon.
+
+    Les clients async (httpx de ChatMistralAI...) et leurs connexions keep-alive
+    survivent ainsi d'un tour de chat et d'une session à l'autre.
+    """
+    global _loop, _thread
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(target=_loop.run_forever, name="rag-event-loop", daemon=True)
+            _thread.start()
+            logger.info("Boucle d'événements partagée démarrée")
+        return _loop
+
+
+def run_sync(coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """Exécute une coroutine sur la boucle partagée et attend son résultat."""
+    loop = get_loop()
+    if threading.current_thread() is _thread:
+        raise RuntimeError("run_sync appelé depuis la boucle partagée (deadlock)")
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    try:
+        return future.result(timeout)
+    except BaseException:
+        future.cancel()
+        raise
+
+
+def iterate_sync(agen: AsyncIterator[T]) -> Iterator[T]:
+    """Consomme un générateur async sur la boucle partagée depuis du code synchrone."""
+    loop = get_loop()
+    items: queue.Queue = queue.Queue()
+
+    async def pump():
+        try:
+            async for item in agen:
+                items.put(item)
+        except asyncio.CancelledError as e:
+            # Le consommateur est prévenu, puis l'annulation se propage normalement
+            items.put(e)
+            raise
+        except Exception as e:
+            items.put(e)
+        finally:
+            items.put(_SENTINEL)
+
+    future = asyncio.run_coroutine_threadsafe(pump(), loop)
+    try:
+        while True:
+            item = items.get()
+            if item is _SENTINEL:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        # Consommateur interrompu (ex: rerun Streamlit) : on arrête le flux côté boucle
+        future.cancel()
@@ -1,9 +1,22 @@
+import hashlib
+
+
 class Document:
-    def __init__(self, content: str):
+    def __init__(self, content: str, source: str | None = None, metadata: dict | None = None):
         self.content = content
+        self.source = source
+        self.metadata = metadata or {}
         self.chunks = []
 
 class Chunk:
-    def __init__(self, content: str, chunk_id: int):
+    def __init__(self, content: str, chunk_id: int, source: str | None = None, config: str = ""):
         self.content = content
         self.chunk_id = chunk_id
+        self.source = source
+        # Signature du chunker (ex: "recursive:1000:200") : un changement de config change l'ID
+        self.config = config
+
+    def fingerprint(self, embedder_name: str) -> str:
+        """ID stable et adressé par contenu : contenu + config de chunking + modèle d'embedding."""
+        payload = "\x00".join([self.config, embedder_name, self.content])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()